@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+from .views import warm, warm_in_background
+
+
+class OpenAPISchemaConfig(AppConfig):
+    name = "openapi_schema"
+    verbose_name = "OpenAPI Schema"
+
+    def ready(self) -> None:
+        # Opt-in, since importing the URL conf this early is not safe in every project.
+        warm_up = getattr(settings, "OPENAPI_SCHEMA_WARM_UP", False)
+        if warm_up == "background":
+            warm_in_background()
+        elif warm_up:
+            warm()
@@ -0,0 +1,483 @@
+import json
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import partial
+from hashlib import sha256
+from pathlib import Path
+from threading import Event, Lock, Thread
+from time import monotonic, sleep, time
+from uuid import uuid4
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+import django
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import VERSION
+from rest_framework.renderers import BaseRenderer
+
+from .typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Generator,
+    Hashable,
+    MediaType,
+    OpenAPI,
+    Optional,
+    SchemaFragment,
+    SerializerType,
+    Union,
+)
+from .utils import close_connections_after, content_encoders, get_schema_fingerprint
+
+if TYPE_CHECKING:
+    from .generator import OpenAPISchemaGenerator
+
+
+class CachedSchema:
+    __slots__ = ("_fingerprint", "compressed", "generated_at", "on_change", "rendered", "schema")
+
+    def __init__(self, schema: OpenAPI) -> None:
+        self.schema = schema
+        self.rendered: dict[MediaType, bytes] = {}
+        self.compressed: dict[tuple[MediaType, str], bytes] = {}
+        self.generated_at = int(time())
+        self._fingerprint: Optional[str] = None
+        # Called when new rendered or compressed content is added.
+        self.on_change: Optional[Callable[[CachedSchema], None]] = None
+
+    @property
+    def fingerprint(self) -> str:
+        # Computed on first use, and then reused for as long as this schema is cached.
+        if self._fingerprint is None:
+            self._fingerprint = get_schema_fingerprint(self.schema)
+        return self._fingerprint
+
+    def render(self, renderer: BaseRenderer, renderer_context: Optional[dict[str, Any]] = None) -> bytes:
+        content = self.rendered.get(renderer.media_type)
+        if content is None:
+            content = renderer.render(self.schema, renderer.media_type, renderer_context or {})
+            if isinstance(content, str):
+                content = content.encode(renderer.charset or "utf-8")
+            self.rendered[renderer.media_type] = content
+            if self.on_change is not None:
+                self.on_change(self)
+        return content
+
+    def compress(self, renderer: BaseRenderer, encoding: str) -> bytes:
+        key = (renderer.media_type, encoding)
+        content = self.compressed.get(key)
+        if content is None:
+            content = content_encoders[encoding](self.render(renderer))
+            self.compressed[key] = content
+            if self.on_change is not None:
+                self.on_change(self)
+        return content
+
+
+class SchemaCache:
+    def __init__(
+        self,
+        *,
+        wait_timeout: float = 30.0,
+        lock_dir: Optional[Union[str, Path]] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """
+        Cache for generated schemas and their rendered representations.
+
+        Entries are keyed by generator configuration, the public flag and the URLconf.
+        Each entry also holds the rendered bytes for each media type it has been rendered to.
+
+        Only one thread generates a missing schema at a time, while other threads
+        requesting the same schema wait for its result.
+
+        :param wait_timeout: Seconds to wait for a schema being generated by another thread or process,
+                             before generating it without waiting.
+        :param lock_dir: Directory for lock files, so that only one process at a time generates a schema.
+                         Processes that waited for the lock reuse the schema generated while they waited,
+                         which is stored as JSON in this directory, unless it has values that cannot be
+                         stored exactly. Only supported on platforms with 'fcntl'.
+        :param ttl: Seconds after which a cached schema is stale. Stale schemas are still returned,
+                    while a fresh schema is generated in a background thread to replace them.
+        """
+        self.entries: dict[Hashable, CachedSchema] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock = Lock()
+        self.wait_timeout = wait_timeout
+        self.lock_dir = Path(lock_dir) if lock_dir is not None else None
+        self.ttl = ttl
+        # Set when the schema being generated for the key is ready.
+        self.generating: dict[Hashable, Event] = {}
+
+    def get(self, key: Hashable) -> Optional[CachedSchema]:
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return cached
+
+    def set(self, key: Hashable, schema: OpenAPI) -> CachedSchema:
+        return self.add(key, CachedSchema(schema))
+
+    def add(self, key: Hashable, cached: CachedSchema) -> CachedSchema:
+        with self.lock:
+            self.entries[key] = cached
+        return cached
+
+    def get_or_generate(self, key: Hashable, generate: Callable[[], OpenAPI]) -> CachedSchema:
+        cached = self.get(key)
+        if cached is not None:
+            if self.is_stale(cached):
+                self.refresh(key, generate)
+            return cached
+
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None:
+                return cached
+
+            event = self.generating.get(key)
+            if event is None:
+                event = self.generating[key] = Event()
+                generating = True
+            else:
+                generating = False
+
+        if not generating:
+            # Another thread is generating the schema.
+            if event.wait(self.wait_timeout):
+                with self.lock:
+                    cached = self.entries.get(key)
+                if cached is not None:
+                    return cached
+
+            # Timed out, or the generation failed.
+            return self.add(key, self.load(key, generate))
+
+        return self.fill(key, generate, event)
+
+    def refresh(self, key: Hashable, generate: Callable[[], OpenAPI]) -> Optional[Thread]:
+        """Generate the schema again in a background thread, unless it is already being generated."""
+        with self.lock:
+            if key in self.generating:
+                return None
+            event = self.generating[key] = Event()
+
+        thread = Thread(
+            target=close_connections_after,
+            args=(self.fill, key, generate, event),
+            name="openapi-schema-refresh",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def fill(self, key: Hashable, generate: Callable[[], OpenAPI], event: Event) -> CachedSchema:
+        try:
+            return self.add(key, self.load(key, generate))
+        finally:
+            with self.lock:
+                del self.generating[key]
+            event.set()
+
+    def is_stale(self, cached: CachedSchema) -> bool:
+        return self.ttl is not None and time() - cached.generated_at >= self.ttl
+
+    def load(self, key: Hashable, generate: Callable[[], OpenAPI]) -> CachedSchema:
+        """Load a schema missing from this cache."""
+        return CachedSchema(self.generate(key, generate))
+
+    def generate(self, key: Hashable, generate: Callable[[], OpenAPI]) -> OpenAPI:
+        if self.lock_dir is None:
+            return generate()
+
+        name = sha256(repr(key).encode()).hexdigest()
+        schema_path = self.lock_dir / f"{name}.json"
+        started = time()
+
+        with self.file_lock(self.lock_dir / f"{name}.lock") as locked:
+            # Reuse the schema if another process generated it while this one was waiting.
+            if locked and schema_path.exists() and schema_path.stat().st_mtime >= started:
+                try:
+                    return json.loads(schema_path.read_bytes(), object_hook=decode_fragment_value)
+                except ValueError:
+                    pass
+
+            schema = generate()
+            if locked:
+                # Schemas that cannot be stored exactly, e.g. with lazy translations,
+                # are not stored, so that waiting processes generate them on their own.
+                try:
+                    content = json.dumps(encode_fragment_value(schema), separators=(",", ":"))
+                except TypeError:
+                    return schema
+                temp_path = self.lock_dir / f"{name}.{uuid4().hex}.tmp"
+                temp_path.write_text(content, encoding="utf-8")
+                temp_path.replace(schema_path)
+            return schema
+
+    @contextmanager
+    def file_lock(self, path: Path) -> Generator[bool, Any, None]:
+        """
+        Hold an exclusive lock on the file, waiting at most 'wait_timeout' seconds for it.
+
+        :returns: Whether the lock was acquired.
+        """
+        if fcntl is None:  # pragma: no cover
+            msg = "File locks require 'fcntl'."
+            raise RuntimeError(msg)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a") as file:
+            deadline = monotonic() + self.wait_timeout
+            while True:
+                try:
+                    fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    if monotonic() >= deadline:
+                        yield False
+                        return
+                    sleep(0.05)
+                else:
+                    break
+
+            try:
+                yield True
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def invalidate(
+        self,
+        generator: Optional["OpenAPISchemaGenerator"] = None,
+        serializer_class: Optional[SerializerType] = None,
+    ) -> None:
+        """
+        Remove cached schemas.
+
+        :param generator: Only remove schemas created by generators with the same configuration.
+                          The generator's discovered endpoints and kept operations are also reset.
+                          Remove all if not given.
+        :param serializer_class: Only reset the generator's operations that use this serializer,
+                                 so that incremental generators only generate those operations again.
+        """
+        if generator is None:
+            self.clear()
+            return
+
+        if serializer_class is not None:
+            generator.invalidate_serializer(serializer_class)
+        else:
+            generator.endpoints = None
+            if generator.fragments is not None:
+                generator.fragments.clear()
+        with self.lock:
+            self.remove([key for key in self.entries if key[0] == generator.cache_key])
+
+    def clear(self) -> None:
+        with self.lock:
+            self.remove(list(self.entries))
+
+    def remove(self, keys: list[Hashable]) -> None:
+        for key in keys:
+            del self.entries[key]
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+
+class DjangoSchemaCache(SchemaCache):
+    def __init__(  # noqa: PLR0913
+        self,
+        alias: str = DEFAULT_CACHE_ALIAS,
+        *,
+        version: str = "",
+        key_prefix: str = "openapi-schema",
+        timeout: Optional[float] = None,
+        lock_timeout: float = 60.0,
+        wait_timeout: float = 30.0,
+        lock_dir: Optional[Union[str, Path]] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """
+        Schema cache shared between processes through Django's cache framework.
+
+        Schemas and their rendered content are kept in this process, and also stored in the given cache,
+        where other processes can read them instead of generating the schema themselves.
+        Only one process generates a missing schema, guarded by a lock added to the cache.
+
+        :param alias: Alias of the Django cache to use.
+        :param version: Version of the code generating the schema, e.g., the deployed release.
+                        Part of the cache key, so that schemas of other releases are not used.
+        :param key_prefix: Prefix for the cache keys.
+        :param timeout: Seconds to keep the schema in the cache. Uses the cache's default timeout if not given.
+        :param lock_timeout: Seconds after which the generation lock expires, e.g., if the generating process dies.
+        :param wait_timeout: Seconds to wait for a schema being generated by another thread or process,
+                             before generating it without waiting.
+        :param lock_dir: Directory for lock files, see 'SchemaCache'.
+        :param ttl: Seconds after which a cached schema is stale, see 'SchemaCache'.
+                    Stale schemas in the shared cache are generated again.
+        """
+        super().__init__(wait_timeout=wait_timeout, lock_dir=lock_dir, ttl=ttl)
+        self.alias = alias
+        self.version = version
+        self.key_prefix = key_prefix
+        self.timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        self.lock_timeout = lock_timeout
+        self.poll_interval = 0.1
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[self.alias]
+
+    def get_shared_key(self, key: Hashable) -> str:
+        fingerprint = sha256(repr((key, self.version, django.__version__, VERSION)).encode()).hexdigest()
+        return f"{self.key_prefix}:{fingerprint}"
+
+    def load(self, key: Hashable, generate: Callable[[], OpenAPI]) -> CachedSchema:
+        shared_key = self.get_shared_key(key)
+        cached = self.read(shared_key)
+        if cached is not None:
+            return cached
+
+        lock_key = f"{shared_key}:lock"
+        token = uuid4().hex
+        if not self.cache.add(lock_key, token, timeout=self.lock_timeout):
+            # Another process is generating the schema.
+            deadline = monotonic() + self.wait_timeout
+            while monotonic() < deadline:
+                sleep(self.poll_interval)
+                cached = self.read(shared_key)
+                if cached is not None:
+                    return cached
+
+            return self.write(shared_key, super().load(key, generate))
+
+        try:
+            return self.write(shared_key, super().load(key, generate))
+        finally:
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+    def read(self, shared_key: str) -> Optional[CachedSchema]:
+        data: Optional[dict[str, Any]] = self.cache.get(shared_key)
+        if data is None:
+            return None
+
+        cached = CachedSchema(data["schema"])
+        cached.rendered.update(data["rendered"])
+        cached.compressed.update(data["compressed"])
+        cached.generated_at = data["generated_at"]
+        if self.is_stale(cached):
+            return None
+        cached.on_change = partial(self.write, shared_key)
+        return cached
+
+    def write(self, shared_key: str, cached: CachedSchema) -> CachedSchema:
+        data = {
+            "schema": cached.schema,
+            "rendered": cached.rendered,
+            "compressed": cached.compressed,
+            "generated_at": cached.generated_at,
+        }
+        self.cache.set(shared_key, data, timeout=self.timeout)
+        cached.on_change = partial(self.write, shared_key)
+        return cached
+
+    def remove(self, keys: list[Hashable]) -> None:
+        self.cache.delete_many([self.get_shared_key(key) for key in keys])
+        super().remove(keys)
+
+
+# Key of the JSON objects that stand for decimals in cached fragments.
+decimal_key = "$decimal"
+
+
+class FragmentCache:
+    def __init__(self, directory: Union[str, Path]) -> None:
+        """
+        Cache for the schema fragments of single operations, kept on disk between processes.
+
+        Fragments are stored under keys that change when the code or options generating them change,
+        see 'OpenAPISchemaGenerator.get_fragment_key', so entries are never stale, only unused.
+        Fragments are stored as JSON. Fragments with values JSON cannot represent exactly,
+        e.g., lazy translations, are not cached, and are generated again in each process.
+
+        :param directory: Directory to store the fragments in.
+        """
+        self.directory = Path(directory)
+
+    def get(self, key: str) -> Optional[SchemaFragment]:
+        try:
+            content = (self.directory / f"{key}.json").read_bytes()
+            return json.loads(content, object_hook=decode_fragment_value)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, fragment: SchemaFragment) -> None:
+        try:
+            content = json.dumps(encode_fragment_value(fragment), separators=(",", ":"))
+        except TypeError:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first, so that other processes never read a partial fragment.
+        temp_path = self.directory / f"{key}.{uuid4().hex}.tmp"
+        temp_path.write_text(content, encoding="utf-8")
+        temp_path.replace(self.directory / f"{key}.json")
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+def encode_fragment_value(value: Any) -> Any:
+    """
+    Convert the value for storing as JSON, so that decoding it gives back an equal value.
+
+    :raises TypeError: If the value cannot be stored exactly.
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return {decimal_key: str(value)}
+    if isinstance(value, list):
+        return [encode_fragment_value(item) for item in value]
+    if isinstance(value, dict) and all(isinstance(name, str) for name in value):
+        if decimal_key in value:
+            msg = f"Cannot store a dict with the {decimal_key!r} key."
+            raise TypeError(msg)
+        return {name: encode_fragment_value(item) for name, item in value.items()}
+
+    msg = f"Cannot store {type(value).__name__!r} values exactly as JSON."
+    raise TypeError(msg)
+
+
+def decode_fragment_value(value: dict[str, Any]) -> Any:
+    if decimal_key in value:
+        return Decimal(value[decimal_key])
+    return value
+
+
+schema_cache = SchemaCache()
+
+
+@receiver(setting_changed)
+def clear_schema_cache(*, setting: str, **kwargs: Any) -> None:  # noqa: ARG001
+    if setting in {"ROOT_URLCONF", "REST_FRAMEWORK"}:
+        schema_cache.clear()
@@ -1,15 +1,28 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from contextvars import copy_context
+from hashlib import sha256
 from importlib import import_module
+from multiprocessing import get_context
+from pathlib import Path
 from types import ModuleType
 
+import django
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.db import connections
 from django.http import Http404
 from django.urls import URLPattern, URLResolver
+from rest_framework import VERSION
 from rest_framework.exceptions import APIException
 from rest_framework.request import Request
+from rest_framework.routers import SimpleRouter
 from rest_framework.serializers import ListSerializer
+from rest_framework.settings import api_settings
 
+from .cache import FragmentCache
 from .typing import (
+    Any,
     APIContact,
     APIInfo,
     APILicense,
@@ -17,24 +30,44 @@ from .typing import (
     APIPathItem,
     APISchema,
     APISecurityScheme,
+    AsView,
     CompatibleView,
     ComponentName,
     EventName,
+    Generator,
     HTTPMethod,
     OpenAPI,
     Optional,
     PathAndMethod,
+    SchemaFragment,
     SchemaWebhook,
     SchemeName,
     SecurityRules,
+    Sequence,
+    SerializerType,
     Union,
     UrlPath,
 )
 from .utils import (
+    Endpoint,
+    SerializerMapper,
+    URLFilter,
+    bind_view,
+    cache_serializer_mappings,
+    close_connections_after,
+    copy_schema,
     get_api_endpoints,
+    get_component_name,
+    get_component_references,
+    get_config_repr,
+    get_dotted_path,
     get_local_path,
+    get_serializer_classes,
+    get_source_fingerprint,
     is_serializer_class,
     map_serializer,
+    persistent_serializer_mappings,
+    reference_nested_serializers,
     warn_component_override,
     warn_method_override,
 )
@@ -56,6 +89,16 @@ class OpenAPISchemaGenerator:
         security_schemes: Optional[dict[SchemeName, APISecurityScheme]] = None,
         security_rules: Optional[SecurityRules] = None,
         terms_of_service: UrlPath = "",
+        cache_serializers: bool = False,
+        nested_components: bool = False,
+        share_views: bool = False,
+        include: Optional[Sequence[str]] = None,
+        exclude: Optional[Sequence[str]] = None,
+        routers: Optional[dict[UrlPath, SimpleRouter]] = None,
+        max_workers: Optional[int] = None,
+        max_processes: Optional[int] = None,
+        fragment_cache_dir: Optional[Union[str, Path]] = None,
+        incremental: bool = False,
     ) -> None:
         """
         Custom Schema Generator for Django Rest Framework views.
@@ -75,6 +118,34 @@ class OpenAPISchemaGenerator:
         :param security_rules: Security schemes to apply if defined authentication or
                                permission class(es) exist on an endpoint.
         :param terms_of_service: API terms of service link.
+        :param cache_serializers: Keep serializer schemas in a process-wide cache between schema generations.
+                                  Serializer schemas are always cached for the duration of a single generation.
+        :param nested_components: Add nested serializers to the schema components and reference them,
+                                  instead of inlining them into every schema they are used in.
+        :param share_views: Create one view per URL pattern for all of its HTTP methods, and bind it to each method
+                            only when that method's operation is generated, instead of creating a view per method.
+                            Views are created for each schema generation, and not kept between them.
+        :param include: Only include endpoints from URL confs included with these namespaces or app names,
+                        or with paths starting with these prefixes (filters starting with '/').
+                        Other URL confs are not inspected. Includes all endpoints if not given.
+        :param exclude: Exclude endpoints from URL confs included with these namespaces or app names,
+                        or with paths starting with these prefixes (filters starting with '/').
+                        Excluded URL confs are not inspected.
+        :param routers: Routers by the path prefix their URLs are included with, e.g., {"/api": router}.
+                        Endpoints for these routers are read directly from their registries instead of
+                        their URL patterns. Other URL patterns are inspected as usual.
+        :param max_workers: Generate the operations in a thread pool with this many threads.
+                            The results are merged in endpoint order, so the schema is the same as when
+                            generated sequentially. Generated sequentially in the calling thread if not given.
+        :param max_processes: Generate the operations in this many forked processes, e.g., for building
+                              a static schema. Endpoints are discovered before forking, and the results are
+                              merged in endpoint order. Requires the 'fork' start method (not on Windows).
+        :param fragment_cache_dir: Directory to keep the generated operations in between processes, e.g.,
+                                   for development servers that restart on every code change. Operations are
+                                   only generated again if the source of their view, its schema, or its
+                                   serializers, or the generator or schema options have changed.
+        :param incremental: Keep the operations of public schemas between generations, and only generate
+                            the operations invalidated with 'invalidate_serializer' again.
         """
         if root_url is None:
             root_url = "/"
@@ -96,9 +167,60 @@ class OpenAPISchemaGenerator:
         self.security_schemes = security_schemes or {}
         self.security_rules = security_rules or {}
         self.terms_of_service = terms_of_service
-        self.endpoints: Optional[list[tuple[str, HTTPMethod, CompatibleView]]] = None
+        self.cache_serializers = cache_serializers
+        self.nested_components = nested_components
+        self.share_views = share_views
+        self.include = include
+        self.exclude = exclude
+        self.url_filter = URLFilter(include=include, exclude=exclude)
+        self.routers = routers
+        self.max_workers = max_workers
+        self.max_processes = max_processes
+        self.fragment_cache = FragmentCache(fragment_cache_dir) if fragment_cache_dir is not None else None
+        self.endpoints: Optional[list[Endpoint]] = None
+        # Operations of the last public schema by path and method, if generated incrementally.
+        self.fragments: Optional[dict[tuple[UrlPath, HTTPMethod], Optional[SchemaFragment]]] = (
+            {} if incremental else None
+        )
+        # Operations using each component (or serializer, by its component name) in the last generated schema.
+        self.component_operations: dict[ComponentName, set[tuple[UrlPath, HTTPMethod]]] = {}
+        self.config_key: Optional[str] = None
+
+    @property
+    def cache_key(self) -> str:
+        """Key of the generator's configuration, computed once its endpoints are discovered."""
+        if self.config_key is None:
+            self.config_key = self.get_cache_key()
+        return self.config_key
+
+    def get_cache_key(self) -> str:
+        # URL patterns are identified by their endpoints, since their representations do not tell
+        # included patterns apart.
+        endpoints = sorted(
+            (endpoint.path, endpoint.method, get_dotted_path(endpoint.callback.cls))
+            for endpoint in self.get_endpoints()
+        )
+        config = (
+            self.title,
+            self.root_url,
+            self.description,
+            endpoints,
+            getattr(self.urlconf, "__name__", self.urlconf),
+            self.version,
+            self.webhooks,
+            self.contact,
+            self.license,
+            self.security_schemes,
+            self.security_rules,
+            self.terms_of_service,
+            self.nested_components,
+            self.include,
+            self.exclude,
+            get_routers_config(self.routers),
+        )
+        return sha256(get_config_repr(config).encode()).hexdigest()
 
-    def get_endpoints(self, request: Optional[Request]) -> list[tuple[UrlPath, HTTPMethod, CompatibleView]]:
+    def get_endpoints(self) -> list[Endpoint]:
         if self.endpoints is None:
             if self.patterns is None:
                 if self.urlconf is None:
@@ -108,53 +230,346 @@ class OpenAPISchemaGenerator:
 
                 self.patterns = self.urlconf.urlpatterns
 
-            self.endpoints = get_api_endpoints(patterns=self.patterns, root=self.root_url, request=request)
+            self.endpoints = get_api_endpoints(
+                patterns=self.patterns,
+                root=self.root_url,
+                url_filter=self.url_filter,
+                routers=self.routers,
+            )
         return self.endpoints
 
-    def get_schema(self, request: Optional[Request], public: bool) -> OpenAPI:
-        schema: OpenAPI = OpenAPI(openapi="3.0.2", info=self.get_info())
-
-        operation_ids: dict[str, PathAndMethod] = {}
-
-        for path, method, view in self.get_endpoints(None if public else request):
-            self.set_security_schemes(method, view)
+    def get_views(
+        self,
+        request: Optional[Request],
+        endpoints: Optional[list[Endpoint]] = None,
+    ) -> Generator[tuple[UrlPath, HTTPMethod, CompatibleView], Any, None]:
+        """
+        Create views for the discovered endpoints. Views are created for each schema generation,
+        and created (or bound to the endpoint's method) only when that endpoint is reached.
 
-            if not self.has_view_permissions(view, method, public):
-                continue  # pragma: no cover
+        :param request: Request to clone for the views, if endpoints should be checked for permissions.
+        :param endpoints: Endpoints to create the views for. Defaults to all discovered endpoints.
+        """
+        shared_views: dict[AsView, CompatibleView] = {}
 
-            local_path = get_local_path(path, self.root_url)
+        for endpoint in self.get_endpoints() if endpoints is None else endpoints:
+            if not self.share_views:
+                view = endpoint.create_view(request)
+            elif endpoint.callback not in shared_views:
+                view = shared_views[endpoint.callback] = endpoint.create_view(request)
+            else:
+                view = shared_views[endpoint.callback]
+                bind_view(view, endpoint.method, request)
 
-            new_operation = self.get_operation(local_path, method, view)
-            if new_operation:
-                operation_id = new_operation["operationId"]
-                if operation_id in operation_ids:
-                    warn_method_override(path, method, operation_id, operation_ids)  # pragma: no cover
+            yield endpoint.path, endpoint.method, view
 
-                operation_ids[operation_id] = PathAndMethod(path=path, method=method)
-                schema.setdefault("paths", {}).setdefault(path, {})
-                schema["paths"][path][method.lower()] = new_operation
+    def get_schema(self, request: Optional[Request], public: bool) -> OpenAPI:
+        with cache_serializer_mappings(persistent=self.cache_serializers):
+            return self.generate_schema(request, public)
 
-            new_components = self.get_components(local_path, method, view)
-            if new_components:
-                schema.setdefault("components", {}).setdefault("schemas", {})
+    def generate_schema(self, request: Optional[Request], public: bool) -> OpenAPI:
+        schema: OpenAPI = OpenAPI(openapi="3.0.2", info=self.get_info())
 
-                for name, component in new_components.items():
-                    if component != schema["components"]["schemas"].get(name, component):
-                        warn_component_override(name)  # pragma: no cover
+        operation_ids: dict[str, PathAndMethod] = {}
+        fragments = list(self.generate_fragments(None if public else request, public))
 
-                schema["components"]["schemas"].update(new_components)
+        for fragment in fragments:
+            self.add_fragment(schema, fragment, operation_ids)
 
-        webhooks = self.get_webhook()
+        with self.collect_nested_components(None) as nested_components:
+            webhooks = self.get_webhook()
         if webhooks:
             schema.setdefault("webhooks", {})
             schema["webhooks"].update(webhooks)
+        self.add_components(schema, nested_components)
 
         if self.security_schemes:
             schema.setdefault("components", {}).setdefault("securitySchemes", {})
             schema["components"]["securitySchemes"] = self.security_schemes
 
+        self.component_operations = self.get_component_operations(schema, fragments)
         return schema
 
+    def get_component_operations(
+        self,
+        schema: OpenAPI,
+        fragments: list[SchemaFragment],
+    ) -> dict[ComponentName, set[tuple[UrlPath, HTTPMethod]]]:
+        """Index the operations by the components they use, including the components nested in those components."""
+        components: dict[ComponentName, APISchema] = schema.get("components", {}).get("schemas", {})
+        # Components referenced by each component, directly or through other components.
+        nested: dict[ComponentName, set[ComponentName]] = {}
+
+        def get_nested(name: ComponentName) -> set[ComponentName]:
+            if name not in nested:
+                found = nested[name] = set()
+                stack = [name]
+                while stack:
+                    for reference in get_component_references(components.get(stack.pop())):
+                        if reference not in found:
+                            found.add(reference)
+                            stack.append(reference)
+            return nested[name]
+
+        component_operations: dict[ComponentName, set[tuple[UrlPath, HTTPMethod]]] = {}
+        for fragment in fragments:
+            names = set(fragment["references"])
+            for name in list(names):
+                names |= get_nested(name)
+            for name in names:
+                component_operations.setdefault(name, set()).add((fragment["path"], fragment["method"]))
+        return component_operations
+
+    def invalidate_serializer(self, serializer_class: SerializerType) -> set[tuple[UrlPath, HTTPMethod]]:
+        """
+        Generate the operations using the given serializer again on the next generation,
+        and forget the cached schemas of the serializer and the serializers nesting it.
+
+        :returns: The invalidated operations.
+        """
+        operations = self.component_operations.get(get_component_name(serializer_class), set())
+        if self.fragments is not None:
+            for operation in operations:
+                self.fragments.pop(operation, None)
+
+        for mapped_class in list(persistent_serializer_mappings):
+            if serializer_class in get_serializer_classes(mapped_class):
+                persistent_serializer_mappings.pop(mapped_class, None)
+        return operations
+
+    def generate_fragments(self, request: Optional[Request], public: bool) -> Generator[SchemaFragment, Any, None]:
+        """
+        Generate the schema fragments for the endpoints in endpoint order.
+
+        :param request: Request to clone for the views, if endpoints should be checked for permissions.
+        :param public: Whether the schema is public.
+        """
+        endpoints = self.get_endpoints()
+        # Kept operations do not depend on the request, since only public schemas are generated without one.
+        kept = self.fragments if request is None else None
+        if kept is None and self.max_workers is None and self.max_processes is None:
+            for path, method, view in self.get_views(request):
+                fragment = self.get_fragment(path, method, view, public)
+                if fragment is not None:
+                    yield fragment
+            return
+
+        # Endpoints of the same URL pattern are generated in the same task, so that they can share a view.
+        tasks: dict[AsView, list[tuple[int, Endpoint]]] = {}
+        for index, endpoint in enumerate(endpoints):
+            if kept is None or (endpoint.path, endpoint.method) not in kept:
+                tasks.setdefault(endpoint.callback, []).append((index, endpoint))
+
+        fragments = self.run_fragment_tasks(list(tasks.values()), request, public)
+        for index, endpoint in enumerate(endpoints):
+            if index in fragments:
+                fragment = fragments[index]
+                if kept is not None:
+                    # Copied so that changes to the generated schema do not change the kept operation.
+                    kept[endpoint.path, endpoint.method] = copy_schema(fragment)
+            else:
+                fragment = copy_schema(kept[endpoint.path, endpoint.method])  # type: ignore[index]
+            if fragment is not None:
+                yield fragment
+
+    def run_fragment_tasks(
+        self,
+        tasks: list[list[tuple[int, Endpoint]]],
+        request: Optional[Request],
+        public: bool,
+    ) -> dict[int, Optional[SchemaFragment]]:
+        if self.max_processes is not None:
+            return self.get_fragments_in_processes(tasks, request, public)
+        if self.max_workers is not None:
+            return self.get_fragments_in_threads(tasks, request, public)
+
+        fragments: dict[int, Optional[SchemaFragment]] = {}
+        for task in tasks:
+            fragments.update(self.get_fragments(task, request, public))
+        return fragments
+
+    def get_fragments_in_threads(
+        self,
+        tasks: list[list[tuple[int, Endpoint]]],
+        request: Optional[Request],
+        public: bool,
+    ) -> dict[int, Optional[SchemaFragment]]:
+        fragments: dict[int, Optional[SchemaFragment]] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Each task is run in a copy of the current context to share the serializer mappings,
+            # and closes the connections opened by the worker thread once it is done.
+            futures = [
+                executor.submit(close_connections_after, copy_context().run, self.get_fragments, task, request, public)
+                for task in tasks
+            ]
+            for future in futures:
+                fragments.update(future.result())
+        return fragments
+
+    def get_fragments_in_processes(
+        self,
+        tasks: list[list[tuple[int, Endpoint]]],
+        request: Optional[Request],
+        public: bool,
+    ) -> dict[int, Optional[SchemaFragment]]:
+        processes: int = self.max_processes  # type: ignore[assignment]
+
+        # Tasks are split into one shard per process. Only endpoint indexes are sent to the processes,
+        # since they are forked with the discovered endpoints, the generator and the request.
+        shards: list[list[int]] = [[] for _ in range(processes)]
+        for number, task in enumerate(tasks):
+            shards[number % processes].extend(index for index, _ in task)
+
+        # Forked processes must not share the database connections of this process,
+        # which are opened again when needed.
+        connections.close_all()
+        fragments: dict[int, Optional[SchemaFragment]] = {}
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=get_context("fork"),
+            initializer=set_process_state,
+            initargs=(self, request, public),
+        ) as executor:
+            for shard_fragments in executor.map(get_process_fragments, [shard for shard in shards if shard]):
+                fragments.update(shard_fragments)
+        return fragments
+
+    def get_fragments(
+        self,
+        endpoints: list[tuple[int, Endpoint]],
+        request: Optional[Request],
+        public: bool,
+    ) -> dict[int, Optional[SchemaFragment]]:
+        indexes = [index for index, _ in endpoints]
+        views = self.get_views(request, endpoints=[endpoint for _, endpoint in endpoints])
+        return {
+            index: self.get_fragment(path, method, view, public)
+            for index, (path, method, view) in zip(indexes, views, strict=True)
+        }
+
+    def get_fragment(
+        self,
+        path: UrlPath,
+        method: HTTPMethod,
+        view: CompatibleView,
+        public: bool,
+    ) -> Optional[SchemaFragment]:
+        self.set_security_schemes(method, view)
+
+        if not self.has_view_permissions(view, method, public):
+            return None  # pragma: no cover
+
+        key: Optional[str] = None
+        if self.fragment_cache is not None:
+            key = self.get_fragment_key(path, method, view)
+            fragment = self.fragment_cache.get(key)
+            if fragment is not None:
+                return fragment
+
+        local_path = get_local_path(path, self.root_url)
+
+        with self.collect_nested_components(view) as nested_components:
+            new_operation = self.get_operation(local_path, method, view)
+            new_components = self.get_components(local_path, method, view)
+
+        components = {**nested_components, **(new_components or {})}
+        # Serializers inlined into other schemas are not components, but their operations still use them.
+        serializer_names: set[ComponentName] = set()
+        for serializer_class in self.get_view_serializer_classes(view):
+            if is_serializer_class(serializer_class):
+                with suppress(ValueError):
+                    serializer_names.add(get_component_name(serializer_class))
+
+        fragment = SchemaFragment(
+            path=path,
+            method=method,
+            operation=new_operation,
+            components=components,
+            references=sorted(set(components) | get_component_references(new_operation) | serializer_names),
+        )
+        if key is not None:
+            self.fragment_cache.set(key, fragment)  # type: ignore[union-attr]
+        return fragment
+
+    def get_fragment_key(self, path: UrlPath, method: HTTPMethod, view: CompatibleView) -> str:
+        """
+        Get the key for caching the fragment of the given operation. The key changes with
+        the source of the view, its schema, and its serializers, and with the schema options.
+        """
+        schema = view.schema
+        options = {name: value for name, value in vars(schema).items() if not name.startswith("_")}
+        serializer_classes = self.get_view_serializer_classes(view)
+
+        # The generator and the serializer mapper stand in for the source of this library.
+        classes = [view.__class__, schema.__class__, self.__class__, SerializerMapper, *serializer_classes]
+        config = (
+            self.cache_key,
+            path,
+            method,
+            get_config_repr(sorted(options.items())),
+            get_config_repr(api_settings.user_settings),
+            get_source_fingerprint(classes),
+            django.__version__,
+            VERSION,
+        )
+        return sha256(repr(config).encode()).hexdigest()
+
+    def get_view_serializer_classes(self, view: CompatibleView) -> set[type]:
+        """Find the serializers the view and its schema use, the serializers nested in them, and their models."""
+        schema = view.schema
+        options = {name: value for name, value in vars(schema).items() if not name.startswith("_")}
+        serializer_classes = get_serializer_classes(options)
+        getters = [
+            getattr(schema, "get_request_serializer_class", None),
+            getattr(schema, "get_response_serializer_class", None),
+            # For other schemas, e.g., DRF's AutoSchema.
+            getattr(view, "get_serializer_class", None),
+        ]
+        for getter in getters:
+            if getter is not None:
+                # Not all views have serializers.
+                with suppress(Exception):
+                    serializer_classes |= get_serializer_classes(getter())
+
+        serializer_classes |= get_serializer_classes(getattr(view, "serializer_class", None))
+        return serializer_classes
+
+    def add_fragment(self, schema: OpenAPI, fragment: SchemaFragment, operation_ids: dict[str, PathAndMethod]) -> None:
+        path, method, new_operation = fragment["path"], fragment["method"], fragment["operation"]
+
+        if new_operation:
+            operation_id = new_operation["operationId"]
+            if operation_id in operation_ids:
+                warn_method_override(path, method, operation_id, operation_ids)  # pragma: no cover
+
+            operation_ids[operation_id] = PathAndMethod(path=path, method=method)
+            schema.setdefault("paths", {}).setdefault(path, {})
+            schema["paths"][path][method.lower()] = new_operation
+
+        self.add_components(schema, fragment["components"])
+
+    @contextmanager
+    def collect_nested_components(
+        self,
+        view: Optional[CompatibleView],
+    ) -> Generator[dict[ComponentName, APISchema], Any, None]:
+        # Serializers that nest themselves are always referenced, even if other nested serializers are inlined.
+        name_component = getattr(getattr(view, "schema", None), "get_component_name", None)
+        with reference_nested_serializers(name_component, inline=not self.nested_components) as components:
+            yield components
+
+    def add_components(self, schema: OpenAPI, new_components: dict[ComponentName, APISchema]) -> None:
+        if not new_components:
+            return
+
+        schema.setdefault("components", {}).setdefault("schemas", {})
+
+        for name, component in new_components.items():
+            if component != schema["components"]["schemas"].get(name, component):
+                warn_component_override(name)  # pragma: no cover
+
+        schema["components"]["schemas"].update(new_components)
+
     def get_info(self) -> APIInfo:
         info = APIInfo(
             title=self.title or "",
@@ -248,3 +663,32 @@ class OpenAPISchemaGenerator:
             }
 
         return webhooks
+
+
+def get_routers_config(routers: Optional[dict[UrlPath, SimpleRouter]]) -> Optional[list[tuple[Any, ...]]]:
+    """Describe the routers by their class and registry, which stay the same between processes."""
+    if routers is None:
+        return None
+    return [
+        (
+            prefix,
+            get_dotted_path(router.__class__),
+            [(url_prefix, get_dotted_path(viewset), basename) for url_prefix, viewset, basename in router.registry],
+        )
+        for prefix, router in routers.items()
+    ]
+
+
+# Generator, request and public flag of the schema generated in a forked process.
+process_state: Optional[tuple[OpenAPISchemaGenerator, Optional[Request], bool]] = None
+
+
+def set_process_state(generator: OpenAPISchemaGenerator, request: Optional[Request], public: bool) -> None:
+    global process_state  # noqa: PLW0603
+    process_state = (generator, request, public)
+
+
+def get_process_fragments(indexes: list[int]) -> dict[int, Optional[SchemaFragment]]:
+    generator, request, public = process_state  # type: ignore[misc]
+    endpoints = generator.get_endpoints()
+    return generator.get_fragments([(index, endpoints[index]) for index in indexes], request, public)
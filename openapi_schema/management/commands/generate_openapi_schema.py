@@ -0,0 +1,169 @@
+from copy import copy
+from pathlib import Path
+from time import perf_counter
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.test import RequestFactory
+from django.urls import NoReverseMatch, resolve, reverse
+from rest_framework.renderers import BaseRenderer, JSONOpenAPIRenderer, OpenAPIRenderer
+from rest_framework.request import Request
+
+from openapi_schema.generator import OpenAPISchemaGenerator
+from openapi_schema.typing import Any, OpenAPI, Optional
+from openapi_schema.utils import content_encoders, content_encoding_suffixes
+
+renderers: dict[str, type[BaseRenderer]] = {
+    "yaml": OpenAPIRenderer,
+    "json": JSONOpenAPIRenderer,
+}
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema into a file."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--url-name",
+            help=(
+                "URL name of a schema view created with 'get_schema_view'. "
+                "The schema is generated with the same options as that view, "
+                "and the other generator options are ignored."
+            ),
+        )
+        parser.add_argument("--title", help="The name of the API.")
+        parser.add_argument("--root-url", help="The root URL prefix of the API schema.")
+        parser.add_argument("--description", help="Longer descriptive text.")
+        parser.add_argument("--urlconf", help="A URL conf module to use. Defaults to settings.ROOT_URLCONF.")
+        parser.add_argument("--api-version", help="The version of the API.")
+        parser.add_argument("--terms-of-service", default="", help="API terms of service link.")
+        parser.add_argument(
+            "--private",
+            action="store_true",
+            help="Hide endpoints an anonymous user does not have permissions to view.",
+        )
+        parser.add_argument(
+            "--include",
+            action="append",
+            help=(
+                "Only include endpoints from URL confs included with this namespace or app name, "
+                "or with paths starting with this prefix (starting with '/'). Can be given multiple times."
+            ),
+        )
+        parser.add_argument(
+            "--exclude",
+            action="append",
+            help=(
+                "Exclude endpoints from URL confs included with this namespace or app name, "
+                "or with paths starting with this prefix (starting with '/'). Can be given multiple times."
+            ),
+        )
+        parser.add_argument(
+            "--format",
+            choices=list(renderers),
+            help="Schema file format. Deducted from the output file extension if not given, otherwise 'yaml'.",
+        )
+        parser.add_argument("--output", "-o", help="File to write the schema to. Defaults to stdout.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of processes to generate the schema in. Endpoints are split between forked processes, "
+                "and the results are merged in endpoint order, so the schema is the same for any number of workers."
+            ),
+        )
+        parser.add_argument(
+            "--compress",
+            action="store_true",
+            help="Also write gzip and deflate compressed copies of the output file.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        output: Optional[Path] = Path(options["output"]) if options["output"] else None
+        if options["compress"] and output is None:
+            msg = "'--compress' requires '--output'."
+            raise CommandError(msg)
+
+        if options["workers"] < 1:
+            msg = "'--workers' must be at least 1."
+            raise CommandError(msg)
+
+        generator, public = self.get_generator(options)
+        if options["workers"] > 1:
+            generator = copy(generator)
+            generator.max_processes = options["workers"]
+        renderer = self.get_renderer(options["format"], output)
+
+        start = perf_counter()
+        schema = generator.get_schema(self.get_request(), public)
+        generated = perf_counter()
+        content = renderer.render(schema, renderer.media_type)
+        rendered = perf_counter()
+
+        if output is None:
+            self.stdout.write(content.decode())
+            stats = self.stderr
+        else:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_bytes(content)
+            stats = self.stdout
+
+        stats.write(
+            f"Generated {count_operations(schema)} operations and {count_components(schema)} components "
+            f"in {generated - start:.3f}s.",
+        )
+        stats.write(f"Rendered {len(content)} bytes in {rendered - generated:.3f}s.")
+
+        if options["compress"]:
+            for encoding, suffix in content_encoding_suffixes.items():
+                start = perf_counter()
+                compressed = content_encoders[encoding](content)
+                output.with_name(output.name + suffix).write_bytes(compressed)
+                stats.write(f"Compressed to {len(compressed)} bytes with {encoding} in {perf_counter() - start:.3f}s.")
+
+    def get_generator(self, options: dict[str, Any]) -> tuple[OpenAPISchemaGenerator, bool]:
+        url_name: Optional[str] = options["url_name"]
+        if url_name is not None:
+            try:
+                view = resolve(reverse(url_name, urlconf=options["urlconf"]), urlconf=options["urlconf"]).func
+            except NoReverseMatch as error:
+                msg = f"No schema view found with URL name {url_name!r}."
+                raise CommandError(msg) from error
+
+            initkwargs: dict[str, Any] = getattr(view, "view_initkwargs", {})
+            if "schema_generator" not in initkwargs:
+                msg = f"View with URL name {url_name!r} is not a schema view."
+                raise CommandError(msg)
+
+            return initkwargs["schema_generator"], bool(initkwargs.get("public"))
+
+        generator = OpenAPISchemaGenerator(
+            title=options["title"],
+            root_url=options["root_url"],
+            description=options["description"],
+            urlconf=options["urlconf"],
+            version=options["api_version"],
+            terms_of_service=options["terms_of_service"],
+            include=options["include"],
+            exclude=options["exclude"],
+        )
+        return generator, not options["private"]
+
+    def get_renderer(self, format_: Optional[str], output: Optional[Path]) -> BaseRenderer:
+        if format_ is None:
+            format_ = "json" if output is not None and output.suffix == ".json" else "yaml"
+        return renderers[format_]()
+
+    def get_request(self) -> Request:
+        request = Request(RequestFactory().get("/"))
+        request.user = AnonymousUser()
+        return request
+
+
+def count_operations(schema: OpenAPI) -> int:
+    return sum(len(path_item) for path_item in schema.get("paths", {}).values())
+
+
+def count_components(schema: OpenAPI) -> int:
+    return len(schema.get("components", {}).get("schemas", {}))
@@ -1,5 +1,6 @@
 import re
 from contextlib import suppress
+from copy import copy
 from inspect import cleandoc
 
 from django.utils.encoding import smart_str
@@ -46,10 +47,13 @@ from .typing import (
 )
 from .utils import (
     convert_to_schema,
+    get_component_name,
     get_path_parameters,
     is_serializer_class,
     map_field,
     map_serializer,
+    nested_components,
+    reference_nested_serializers,
     serializer_pattern,
 )
 
@@ -104,10 +108,24 @@ class OpenAPISchema:
         self.tags = tags
 
         self.__view: Optional[CompatibleView] = None
+        self.__name: Optional[str] = None
+
+    def __set_name__(self, owner: type[CompatibleView], name: str) -> None:
+        self.__name = name
 
     def __get__(self, instance: Optional[CompatibleView], owner: type[CompatibleView]) -> "OpenAPISchema":
-        self.__view = instance
-        return self
+        if instance is None:
+            return self
+
+        # Bind a copy to the view instead of the schema itself, since the schema is shared
+        # by all instances of the view class, which may be used from multiple threads.
+        # The copy shares its options with the schema.
+        bound = copy(self)
+        bound.__view = instance
+        if self.__name is not None:
+            # Reused for later accesses from the same view.
+            instance.__dict__[self.__name] = bound
+        return bound
 
     @property
     def view(self) -> CompatibleView:
@@ -192,23 +210,7 @@ class OpenAPISchema:
         return operation
 
     def get_component_name(self, serializer: SerializerOrSerializerType) -> ComponentName:
-        if isinstance(serializer, ListSerializer):
-            serializer = getattr(serializer, "child", serializer)
-
-        if not is_serializer_class(serializer):
-            serializer = serializer.__class__
-
-        serializer_class_name = serializer.__name__
-        component_name = serializer_pattern.sub("", serializer_class_name)
-
-        if component_name == "":  # pragma: no cover
-            msg = (
-                f"{serializer_class_name!r} is an invalid class name for schema generation. "
-                f"Serializer's class name should be unique and explicit. e.g., 'ItemSerializer'"
-            )
-            raise ValueError(msg)
-
-        return component_name
+        return get_component_name(serializer)
 
     def initialize_serializer(self, serializer_class: SerializerType) -> Serializer:
         return serializer_class(many=getattr(serializer_class, "many", False))
@@ -223,6 +225,12 @@ class OpenAPISchema:
         return getattr(self.view, "output_serializer_class", None)  # pragma: no cover
 
     def get_components(self, *args: Any, **kwargs: Any) -> dict[ComponentName, APISchema]:
+        if nested_components.get() is None:
+            # Collect the components of serializers that nest themselves when called outside the generator.
+            with reference_nested_serializers(self.get_component_name, inline=True) as referenced:
+                components = self.get_components(*args, **kwargs)
+            return {**referenced, **components}
+
         components: dict[ComponentName, APISchema] = {}
 
         request_serializer_class = self.get_request_serializer_class()
@@ -2,11 +2,15 @@ from __future__ import annotations
 
 from types import ModuleType
 from typing import (
+    TYPE_CHECKING,
     Annotated,
     Any,
     Callable,
     Generator,
+    Hashable,
+    Iterable,
     Literal,
+    MutableMapping,
     Optional,
     Protocol,
     Sequence,
@@ -29,6 +33,7 @@ except ImportError:
 
 from django.http.response import HttpResponseBase
 from rest_framework.authentication import BaseAuthentication
+from rest_framework.fields import Field
 from rest_framework.parsers import BaseParser  # noqa: TC002
 from rest_framework.permissions import BasePermission
 from rest_framework.renderers import BaseRenderer  # noqa: TC002
@@ -38,6 +43,7 @@ from rest_framework.serializers import Serializer
 
 __all__ = [
     "APIXML",
+    "TYPE_CHECKING",
     "APICallback",
     "APIComponents",
     "APIContact",
@@ -80,16 +86,19 @@ __all__ = [
     "CookieParameter",
     "ErrorText",
     "EventName",
-    "Generator",
+    "FieldMapper",
     "Generator",
     "GenericView",
     "HTTPMethod",
     "HTTPSecurityScheme",
     "HTTPSecurityType",
+    "Hashable",
     "HeaderParameter",
+    "Iterable",
     "Literal",
     "MediaType",
     "ModuleType",
+    "MutableMapping",
     "MutualTLSSecurityScheme",
     "MutualTLSSecurityType",
     "OAuth2SecurityScheme",
@@ -111,12 +120,14 @@ __all__ = [
     "Required",
     "ResponseKind",
     "SchemaCallbackData",
+    "SchemaFragment",
     "SchemaLinks",
     "SchemaWebhook",
     "SchemeName",
     "ScopeName",
     "SecurityRules",
     "SecuritySchemeType",
+    "Sequence",
     "SerializerOrSerializerType",
     "SerializerType",
     "StatusCode",
@@ -152,6 +163,7 @@ HeaderParameter: TypeAlias = str
 CookieParameter: TypeAlias = str
 OperationBaseName: TypeAlias = str
 ResponseKind = Union[ErrorText, SerializerType]
+FieldMapper: TypeAlias = Callable[[Field], "APISchema"]
 
 _View = TypeVar("_View", bound=Callable[..., HttpResponseBase])
 
@@ -229,6 +241,15 @@ class PathAndMethod(TypedDict):
     method: HTTPMethod
 
 
+class SchemaFragment(TypedDict):
+    path: str
+    method: HTTPMethod
+    operation: "APIOperation"
+    components: dict[str, "APISchema"]
+    # Names of the components the operation uses, and of the serializers its view uses.
+    references: list[str]
+
+
 _APIRefNotRequired = TypedDict("_APIRefNotRequired", {"$ref": str}, total=False)
 _APIRefRequired = TypedDict("_APIRefRequired", {"$ref": str})
 
@@ -1,16 +1,28 @@
 import copy
+import gzip
+import json
 import re
+import sys
 import warnings
+import zlib
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
 from decimal import Decimal
 from functools import partial
+from hashlib import sha256
 from inspect import cleandoc
+from pathlib import Path
+from weakref import WeakKeyDictionary
 
 from django.contrib.admindocs.views import simplify_regex
 from django.core import validators
+from django.db import connections
 from django.urls import URLPattern, URLResolver
 from rest_framework import fields
 from rest_framework.fields import _UnvalidatedField, empty
+from rest_framework.renderers import BaseRenderer
 from rest_framework.request import Request, clone_request
+from rest_framework.routers import SimpleRouter
 from rest_framework.serializers import ListSerializer, Serializer
 from rest_framework.settings import api_settings
 from rest_framework.views import APIView
@@ -23,10 +35,15 @@ from .typing import (
     Callable,
     CompatibleView,
     ComponentName,
+    FieldMapper,
     Generator,
     HTTPMethod,
+    Iterable,
+    MutableMapping,
+    OpenAPI,
     Optional,
     PathAndMethod,
+    Sequence,
     SerializerOrSerializerType,
     TypeGuard,
     Union,
@@ -36,7 +53,213 @@ from .typing import (
 url_variables_pattern = re.compile("{([^}]+)}")
 serializer_pattern = re.compile("serializer", flags=re.IGNORECASE)
 path_parameter_pattern = re.compile(r"<[^>:]*:?(?P<parameter>\w+)>")
+router_url_pattern = re.compile(r"[()\[\]\\?*+|<>^$]")
+format_suffix_pattern = re.compile(r"\\\.\(\?P<\w+>[^)]*\)[/?$]*$")
 path_format_parameter = re.compile(r"^[^.]*[.]\{[^}]+}/?$")
+component_reference_prefix = "#/components/schemas/"
+object_address_pattern = re.compile(r" at 0x[0-9a-fA-F]+")
+
+content_encoders: dict[str, Callable[[bytes], bytes]] = {
+    "gzip": partial(gzip.compress, mtime=0),
+    "deflate": zlib.compress,
+}
+content_encoding_suffixes: dict[str, str] = {
+    "gzip": ".gz",
+    "deflate": ".zz",
+}
+
+# Serializer arguments that only affect the field the serializer is used as, not the serializer's own schema.
+serializer_field_kwargs = frozenset(
+    (
+        "allow_empty",
+        "allow_null",
+        "default",
+        "error_messages",
+        "help_text",
+        "initial",
+        "label",
+        "max_length",
+        "min_length",
+        "partial",
+        "read_only",
+        "required",
+        "source",
+        "style",
+        "validators",
+        "write_only",
+    ),
+)
+
+SerializerMapping = tuple[APISchema, tuple[Serializer, ...]]
+SerializerMappings = MutableMapping[type[Serializer], dict[str, SerializerMapping]]
+
+serializer_mappings: ContextVar[Optional[SerializerMappings]] = ContextVar("serializer_mappings", default=None)
+persistent_serializer_mappings: SerializerMappings = WeakKeyDictionary()
+# Hashes of source files by path, read once per process.
+source_fingerprints: dict[str, str] = {}
+
+
+class NestedComponents:
+    __slots__ = ("get_component_name", "inline", "schemas")
+
+    def __init__(self, get_component_name: Callable[[Serializer], ComponentName], *, inline: bool) -> None:
+        self.get_component_name = get_component_name
+        self.inline = inline
+        self.schemas: dict[ComponentName, APISchema] = {}
+
+
+class SerializerFrame:
+    __slots__ = ("children", "key", "parent", "referenced", "references", "schema", "serializer", "target")
+
+    def __init__(
+        self,
+        serializer: Serializer,
+        target: APISchema,
+        parent: Optional["SerializerFrame"],
+        key: Optional[str],
+    ) -> None:
+        self.serializer = serializer
+        self.target = target
+        self.parent = parent
+        self.key = key
+        self.schema = APISchema()
+        # Nested serializers to inline, and the schemas to fill with their content.
+        self.children: list[tuple[Serializer, APISchema]] = []
+        # Serializers whose components the schema references.
+        self.references: list[Serializer] = []
+        # Whether the serializer nests itself, and thus needs to be a component.
+        self.referenced = False
+
+
+class SerializerMapper:
+    def __init__(self) -> None:
+        """
+        Maps serializers and the serializers nested in them.
+
+        Nested serializers are mapped using an explicit stack instead of recursion,
+        so that deeply nested serializers cannot exhaust the Python stack.
+        Serializers that nest themselves are referenced as components.
+        """
+        self.mappings = serializer_mappings.get()
+        self.components = nested_components.get()
+        self.tasks: list[Union[tuple[Serializer, APISchema, Optional[SerializerFrame]], SerializerFrame]] = []
+        self.active: dict[type[Serializer], list[SerializerFrame]] = {}
+        self.current: Optional[SerializerFrame] = None
+
+    def map(self, serializer: Serializer, *, nested: bool = False) -> APISchema:
+        token = active_mapper.set(self)
+        try:
+            if nested and self.references_nested:
+                result = self.get_reference(serializer)
+            else:
+                result = APISchema()
+                self.tasks.append((serializer, result, None))
+
+            while self.tasks:
+                task = self.tasks.pop()
+                if isinstance(task, SerializerFrame):
+                    self.finish(task)
+                else:
+                    self.start(*task)
+        finally:
+            active_mapper.reset(token)
+
+        return result
+
+    @property
+    def references_nested(self) -> bool:
+        return self.components is not None and not self.components.inline
+
+    def nest(self, serializer: Serializer) -> APISchema:
+        if self.current is None or self.references_nested:
+            if self.current is not None:
+                self.current.references.append(serializer)
+            return self.get_reference(serializer)
+
+        # Filled in when the nested serializer has been mapped.
+        schema = APISchema()
+        self.current.children.append((serializer, schema))
+        return schema
+
+    def start(self, serializer: Serializer, target: APISchema, parent: Optional[SerializerFrame]) -> None:
+        if isinstance(serializer, ListSerializer):
+            items = APISchema()
+            fill_schema(target, APISchema(type="array", items=items))
+            self.tasks.append((getattr(serializer, "child", serializer), items, parent))
+            return
+
+        if self.active.get(serializer.__class__):
+            fill_schema(target, self.get_reference(serializer))
+            if parent is not None:
+                parent.references.append(serializer)
+            return
+
+        key = self.get_key(serializer)
+        if key is not None:
+            mapping = self.mappings.get(serializer.__class__, {}).get(key)  # type: ignore[union-attr]
+            if mapping is not None:
+                # Copied so that callers cannot modify the memoized schema.
+                fill_schema(target, copy_schema(mapping[0]))
+                for reference in mapping[1]:
+                    self.get_reference(reference)
+                if parent is not None:
+                    parent.references.extend(mapping[1])
+                return
+
+        frame = SerializerFrame(serializer, target, parent, key)
+        self.current = frame
+        try:
+            frame.schema = map_serializer_fields(serializer)
+        finally:
+            self.current = None
+
+        self.active.setdefault(serializer.__class__, []).append(frame)
+        self.tasks.append(frame)
+        self.tasks.extend((child, schema, frame) for child, schema in reversed(frame.children))
+
+    def finish(self, frame: SerializerFrame) -> None:
+        self.active[frame.serializer.__class__].pop()
+
+        if frame.key is not None:
+            mappings = self.mappings.setdefault(frame.serializer.__class__, {})  # type: ignore[union-attr]
+            mappings[frame.key] = (copy_schema(frame.schema), tuple(frame.references))
+
+        if frame.referenced and self.components is not None:
+            name = self.components.get_component_name(frame.serializer)
+            self.components.schemas.setdefault(name, copy_schema(frame.schema))
+
+        if frame.parent is not None:
+            frame.parent.references.extend(frame.references)
+
+        fill_schema(frame.target, frame.schema)
+
+    def get_key(self, serializer: Serializer) -> Optional[str]:
+        if self.mappings is None:
+            return None
+
+        key = get_serializer_cache_key(serializer)
+        if key is not None and self.references_nested:
+            key = f"$ref:{key}"
+        return key
+
+    def get_reference(self, serializer: Serializer) -> APISchema:
+        get_name = get_component_name if self.components is None else self.components.get_component_name
+        name = get_name(serializer)
+
+        if self.components is not None and name not in self.components.schemas:
+            active = self.active.get(serializer.__class__)
+            if active:
+                # Added as a component when the serializer has been mapped.
+                active[-1].referenced = True
+            else:
+                schema = self.components.schemas[name] = APISchema()
+                self.tasks.append((serializer, schema, None))
+
+        return APISchema(**{"$ref": f"#/components/schemas/{name}"})
+
+
+nested_components: ContextVar[Optional[NestedComponents]] = ContextVar("nested_components", default=None)
+active_mapper: ContextVar[Optional[SerializerMapper]] = ContextVar("active_mapper", default=None)
 
 
 def is_serializer_class(obj: Any) -> TypeGuard[Serializer]:
@@ -63,126 +286,310 @@ def convert_to_schema(schema: Union[list[Any], dict[str, Any], Any]) -> APISchem
     )
 
 
-def map_field(field: fields.Field) -> APISchema:  # noqa: PLR0911, PLR0912, PLR0915 pragma: no cover
-    if isinstance(field, ListSerializer):
-        return APISchema(type="array", items=map_serializer(field.child))  # type: ignore[arg-type]
-
-    if isinstance(field, Serializer):
-        return map_serializer(field)
-
-    if isinstance(field, fields.ChoiceField):
-        choices = list(dict.fromkeys(field.choices))
-        type_: Optional[APIType] = None
-
-        if all(isinstance(choice, bool) for choice in choices):
-            type_ = "boolean"
-        elif all(isinstance(choice, int) for choice in choices):
-            type_ = "integer"
-        elif all(isinstance(choice, (int, float, Decimal)) for choice in choices):
-            type_ = "number"
-        elif all(isinstance(choice, str) for choice in choices):
-            type_ = "string"
-
-        mapping = APISchema(enum=choices)
-        if type_ is not None:
-            mapping["type"] = type_
-
-        if isinstance(field, fields.MultipleChoiceField):
-            return APISchema(type="array", items=mapping)
-        return mapping
-
-    if isinstance(field, fields.ListField):
-        mapping = APISchema(type="array", items={})
-        if not isinstance(field.child, _UnvalidatedField):
-            mapping["items"] = map_field(field.child)
-        return mapping
-
-    if isinstance(field, fields.DateField):
-        return APISchema(type="string", format="date")
-
-    if isinstance(field, fields.DateTimeField):
-        return APISchema(type="string", format="date-time")
-
-    if isinstance(field, fields.EmailField):
-        return APISchema(type="string", format="email")
-
-    if isinstance(field, fields.URLField):
-        return APISchema(type="string", format="uri")
-
-    if isinstance(field, fields.UUIDField):
-        return APISchema(type="string", format="uuid")
-
-    if isinstance(field, fields.IPAddressField):
-        content = APISchema(type="string")
-        if field.protocol != "both":
-            content["format"] = field.protocol  # type: ignore[typeddict-item]
-        return content
-
-    if isinstance(field, fields.DecimalField):
-        if getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING):
-            content = APISchema(type="string", format="decimal")
-        else:
-            content = APISchema(type="number")
-
-        if field.decimal_places:
-            content["multipleOf"] = float("." + (field.decimal_places - 1) * "0" + "1")
-        if field.max_whole_digits:
-            content["maximum"] = int(field.max_whole_digits * "9") + 1
-            content["minimum"] = -content["maximum"]
-        if field.max_value:
-            content["maximum"] = field.max_value  # type: ignore[typeddict-item]
-        if field.min_value:
-            content["minimum"] = field.min_value  # type: ignore[typeddict-item]
-
-        return content
-
-    if isinstance(field, fields.FloatField):
-        content = APISchema(type="number")
-        if field.max_value:
-            content["maximum"] = field.max_value
-        if field.min_value:
-            content["minimum"] = field.min_value
-        return content
-
-    if isinstance(field, fields.IntegerField):
-        content = APISchema(type="integer")
-        if field.max_value:
-            content["maximum"] = field.max_value
-            if field.max_value > 2_147_483_647:  # noqa: PLR2004
-                content["format"] = "int64"
-        if field.min_value:
-            content["minimum"] = field.min_value
-            if field.min_value > 2_147_483_647:  # noqa: PLR2004
-                content["format"] = "int64"
-        return content
-
-    if isinstance(field, fields.FileField):
-        return APISchema(type="string", format="binary")
-
-    if isinstance(field, fields.BooleanField):
-        return APISchema(type="boolean")
-
-    if isinstance(field, fields.JSONField):
-        return APISchema(type="object")
-
-    if isinstance(field, fields.DictField):
-        return APISchema(type="object")
-
-    if isinstance(field, fields.HStoreField):
-        return APISchema(type="object")
+field_mappers: dict[type[fields.Field], FieldMapper] = {}
+resolved_field_mappers: dict[type[fields.Field], FieldMapper] = {}
+
+
+def register_field_mapper(*field_classes: type[fields.Field]) -> Callable[[FieldMapper], FieldMapper]:
+    """
+    Register a function for mapping the given field classes to a schema.
+
+    The mapper is also used for subclasses of the given field classes,
+    unless a mapper has been registered for a class closer in their MRO.
+    """
+
+    def decorator(mapper: FieldMapper) -> FieldMapper:
+        for field_class in field_classes:
+            field_mappers[field_class] = mapper
+        resolved_field_mappers.clear()
+        return mapper
+
+    return decorator
+
+
+def get_field_mapper(field_class: type[fields.Field]) -> FieldMapper:
+    mapper = resolved_field_mappers.get(field_class)
+    if mapper is None:
+        mapper = next(field_mappers[cls] for cls in field_class.__mro__ if cls in field_mappers)
+        resolved_field_mappers[field_class] = mapper
+    return mapper
 
+
+def map_field(field: fields.Field) -> APISchema:
+    return get_field_mapper(field.__class__)(field)
+
+
+@register_field_mapper(fields.Field)
+def map_default_field(field: fields.Field) -> APISchema:  # noqa: ARG001
     return APISchema(type="string")
 
 
-def map_serializer(serializer: SerializerOrSerializerType) -> APISchema:
-    required = []
-    result = APISchema(type="object", properties={})
+@register_field_mapper(ListSerializer)
+def map_list_serializer_field(field: ListSerializer) -> APISchema:
+    return APISchema(type="array", items=map_nested_serializer(field.child))  # type: ignore[arg-type]
+
+
+@register_field_mapper(Serializer)
+def map_serializer_field(field: Serializer) -> APISchema:
+    return map_nested_serializer(field)
+
+
+@register_field_mapper(fields.ChoiceField)
+def map_choice_field(field: fields.ChoiceField) -> APISchema:
+    choices = list(dict.fromkeys(field.choices))
+    type_: Optional[APIType] = None
+
+    if all(isinstance(choice, bool) for choice in choices):
+        type_ = "boolean"
+    elif all(isinstance(choice, int) for choice in choices):
+        type_ = "integer"
+    elif all(isinstance(choice, (int, float, Decimal)) for choice in choices):
+        type_ = "number"
+    elif all(isinstance(choice, str) for choice in choices):
+        type_ = "string"
+
+    mapping = APISchema(enum=choices)
+    if type_ is not None:
+        mapping["type"] = type_
+    return mapping
+
+
+@register_field_mapper(fields.MultipleChoiceField)
+def map_multiple_choice_field(field: fields.MultipleChoiceField) -> APISchema:
+    return APISchema(type="array", items=map_choice_field(field))
+
+
+@register_field_mapper(fields.ListField)
+def map_list_field(field: fields.ListField) -> APISchema:
+    mapping = APISchema(type="array", items={})
+    if not isinstance(field.child, _UnvalidatedField):
+        mapping["items"] = map_field(field.child)
+    return mapping
+
+
+@register_field_mapper(fields.DateField)
+def map_date_field(field: fields.DateField) -> APISchema:  # noqa: ARG001
+    return APISchema(type="string", format="date")
+
+
+@register_field_mapper(fields.DateTimeField)
+def map_datetime_field(field: fields.DateTimeField) -> APISchema:  # noqa: ARG001
+    return APISchema(type="string", format="date-time")
+
+
+@register_field_mapper(fields.EmailField)
+def map_email_field(field: fields.EmailField) -> APISchema:  # noqa: ARG001
+    return APISchema(type="string", format="email")
+
+
+@register_field_mapper(fields.URLField)
+def map_url_field(field: fields.URLField) -> APISchema:  # noqa: ARG001
+    return APISchema(type="string", format="uri")
+
+
+@register_field_mapper(fields.UUIDField)
+def map_uuid_field(field: fields.UUIDField) -> APISchema:  # noqa: ARG001
+    return APISchema(type="string", format="uuid")
+
+
+@register_field_mapper(fields.IPAddressField)
+def map_ip_address_field(field: fields.IPAddressField) -> APISchema:
+    content = APISchema(type="string")
+    if field.protocol != "both":
+        content["format"] = field.protocol  # type: ignore[typeddict-item]
+    return content
+
+
+@register_field_mapper(fields.DecimalField)
+def map_decimal_field(field: fields.DecimalField) -> APISchema:
+    if getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING):
+        content = APISchema(type="string", format="decimal")
+    else:
+        content = APISchema(type="number")
+
+    if field.decimal_places:
+        content["multipleOf"] = float("." + (field.decimal_places - 1) * "0" + "1")
+    if field.max_whole_digits:
+        content["maximum"] = int(field.max_whole_digits * "9") + 1
+        content["minimum"] = -content["maximum"]
+    if field.max_value:
+        content["maximum"] = field.max_value  # type: ignore[typeddict-item]
+    if field.min_value:
+        content["minimum"] = field.min_value  # type: ignore[typeddict-item]
+
+    return content
+
+
+@register_field_mapper(fields.FloatField)
+def map_float_field(field: fields.FloatField) -> APISchema:
+    content = APISchema(type="number")
+    if field.max_value:
+        content["maximum"] = field.max_value
+    if field.min_value:
+        content["minimum"] = field.min_value
+    return content
 
+
+@register_field_mapper(fields.IntegerField)
+def map_integer_field(field: fields.IntegerField) -> APISchema:
+    content = APISchema(type="integer")
+    if field.max_value:
+        content["maximum"] = field.max_value
+        if field.max_value > 2_147_483_647:  # noqa: PLR2004
+            content["format"] = "int64"
+    if field.min_value:
+        content["minimum"] = field.min_value
+        if field.min_value > 2_147_483_647:  # noqa: PLR2004
+            content["format"] = "int64"
+    return content
+
+
+@register_field_mapper(fields.FileField)
+def map_file_field(field: fields.FileField) -> APISchema:  # noqa: ARG001
+    return APISchema(type="string", format="binary")
+
+
+@register_field_mapper(fields.BooleanField)
+def map_boolean_field(field: fields.BooleanField) -> APISchema:  # noqa: ARG001
+    return APISchema(type="boolean")
+
+
+@register_field_mapper(fields.JSONField, fields.DictField, fields.HStoreField)
+def map_object_field(field: fields.Field) -> APISchema:  # noqa: ARG001
+    return APISchema(type="object")
+
+
+@contextmanager
+def cache_serializer_mappings(*, persistent: bool = False) -> Generator[SerializerMappings, Any, None]:
+    """
+    Memoize the results of 'map_serializer' by serializer class inside this context.
+
+    :param persistent: Use the process-wide cache, which keeps the results for as long as
+                       the serializer classes exist. Otherwise, the results are kept until the context exits.
+    """
+    mappings = serializer_mappings.get()
+    if mappings is not None:
+        yield mappings
+        return
+
+    mappings = persistent_serializer_mappings if persistent else {}
+    token = serializer_mappings.set(mappings)
+    try:
+        yield mappings
+    finally:
+        serializer_mappings.reset(token)
+
+
+@contextmanager
+def reference_nested_serializers(
+    name_component: Optional[Callable[[Serializer], ComponentName]] = None,
+    *,
+    inline: bool = False,
+) -> Generator[dict[ComponentName, APISchema], Any, None]:
+    """
+    Map nested serializers as references to components inside this context, instead of inlining them.
+
+    :param name_component: Function for naming the components. Uses the serializer name by default.
+    :param inline: Inline nested serializers, and only reference serializers that nest themselves.
+    :returns: The referenced components by name. Filled in as serializers are mapped.
+    """
+    components = NestedComponents(name_component or get_component_name, inline=inline)
+    token = nested_components.set(components)
+    try:
+        yield components.schemas
+    finally:
+        nested_components.reset(token)
+
+
+def map_nested_serializer(serializer: Serializer) -> APISchema:
+    mapper = active_mapper.get()
+    if mapper is None:
+        return SerializerMapper().map(serializer, nested=True)
+    return mapper.nest(serializer)
+
+
+def get_component_name(serializer: SerializerOrSerializerType) -> ComponentName:
+    if isinstance(serializer, ListSerializer):
+        serializer = getattr(serializer, "child", serializer)
+
+    if not is_serializer_class(serializer):
+        serializer = serializer.__class__
+
+    serializer_class_name = serializer.__name__
+    component_name = serializer_pattern.sub("", serializer_class_name)
+
+    if component_name == "":  # pragma: no cover
+        msg = (
+            f"{serializer_class_name!r} is an invalid class name for schema generation. "
+            f"Serializer's class name should be unique and explicit. e.g., 'ItemSerializer'"
+        )
+        raise ValueError(msg)
+
+    return component_name
+
+
+def get_serializer_cache_key(serializer: Serializer) -> Optional[str]:
+    """Get the key for memoizing the schema of the given serializer, or None if it cannot be memoized."""
+    if getattr(serializer, "_args", ()):
+        return None
+
+    key: list[str] = []
+    for name, value in sorted(getattr(serializer, "_kwargs", {}).items()):
+        if name in serializer_field_kwargs:
+            continue
+        # Other values could affect the serializer fields in ways that cannot be known.
+        if not is_literal(value):
+            return None
+        key.append(f"{name}={value!r}")
+
+    return ",".join(key)
+
+
+def is_literal(value: Any) -> bool:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return all(is_literal(item) for item in value)
+    return value is None or isinstance(value, (str, int, float))
+
+
+def copy_schema(schema: Any) -> Any:
+    """Copy the dicts and lists in the given schema so that the copy can be modified freely."""
+    if isinstance(schema, dict):
+        return {key: copy_schema(value) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [copy_schema(item) for item in schema]
+    return schema
+
+
+def map_serializer(serializer: SerializerOrSerializerType) -> APISchema:
     if is_serializer_class(serializer):
         serializer = serializer(many=getattr(serializer, "many", False))  # type: ignore[operator]
 
-    if isinstance(serializer, ListSerializer):
-        return APISchema(type="array", items=map_serializer(getattr(serializer, "child", serializer)))
+    return SerializerMapper().map(serializer)  # type: ignore[arg-type]
+
+
+def fill_schema(target: APISchema, schema: APISchema) -> None:
+    """Fill the target schema with the given schema, keeping any keys already set to the target last."""
+    extra = target.copy()
+    target.clear()
+    target.update(wrap_reference(schema) if extra else schema)
+    target.update(extra)
+
+
+def wrap_reference(schema: APISchema) -> APISchema:
+    """
+    Wrap a reference in 'allOf', so that keys added next to it are not ignored.
+    Siblings of '$ref' are ignored in OpenAPI 3.0.
+    """
+    if "$ref" not in schema:
+        return schema
+    wrapped = APISchema(allOf=[APISchema(**{"$ref": schema["$ref"]})])
+    wrapped.update({key: value for key, value in schema.items() if key != "$ref"})  # type: ignore[typeddict-item]
+    return wrapped
+
+
+def map_serializer_fields(serializer: Serializer) -> APISchema:
+    required = []
+    result = APISchema(type="object", properties={})
 
     for field in serializer.fields.values():  # pragma: no cover
         if isinstance(field, fields.HiddenField):
@@ -206,6 +613,8 @@ def map_serializer(serializer: SerializerOrSerializerType) -> APISchema:
 
         map_field_validators(field, schema)
 
+        if len(schema) > 1:
+            schema = wrap_reference(schema)
         result["properties"][field.field_name] = schema  # type: ignore[index]
 
     if required:
@@ -252,37 +661,267 @@ def map_field_validators(field: fields.Field, schema: APISchema) -> None:  # pra
                 schema["minimum"] = -schema["maximum"]
 
 
+# Allowed methods by view class and the HTTP method names it accepts.
+allowed_methods: dict[tuple[type[APIView], tuple[str, ...]], tuple[HTTPMethod, ...]] = {}
+
+
+class Endpoint:
+    __slots__ = ("callback", "method", "path", "priority")
+
+    def __init__(self, path: UrlPath, method: HTTPMethod, callback: AsView) -> None:
+        """
+        An API endpoint found from the URL patterns.
+
+        Holds only what is needed to create the endpoint's view, so that discovered endpoints
+        can be kept between schema generations without holding on to views or requests.
+
+        :param path: URL path of the endpoint.
+        :param method: HTTP method of the endpoint.
+        :param callback: View function created with 'as_view' for the endpoint's URL pattern.
+        """
+        self.path = path
+        self.method = method
+        self.callback = callback
+        self.priority = method_priorities.get(method, len(method_priorities))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(path={self.path!r}, method={self.method!r})"
+
+    def create_view(self, request: Optional[Request]) -> CompatibleView:
+        return create_view(self.callback, self.method, request)
+
+
+method_priorities: dict[HTTPMethod, int] = {"GET": 0, "POST": 1, "PUT": 2, "PATCH": 3, "DELETE": 4}
+
+
+class URLFilter:
+    def __init__(self, include: Optional[Sequence[str]] = None, exclude: Optional[Sequence[str]] = None) -> None:
+        """
+        Filter for the URL patterns to inspect when finding API endpoints.
+
+        Filters are either namespaces or app names of included URL confs, or path prefixes starting with '/'.
+        Excluded URL confs are skipped without inspecting their patterns, and so are URL confs that
+        cannot contain any included endpoints.
+
+        :param include: Only include endpoints matching any of these filters. Include all if not given.
+        :param exclude: Exclude endpoints matching any of these filters.
+        """
+        self.include_all = not include
+        self.include_names, self.include_prefixes = split_url_filters(include or [])
+        self.exclude_names, exclude_prefixes = split_url_filters(exclude or [])
+        self.include_pattern = compile_path_prefixes(self.include_prefixes)
+        self.exclude_pattern = compile_path_prefixes(exclude_prefixes)
+
+    def is_included(self, path: UrlPath, resolver: Optional[URLResolver] = None) -> bool:
+        if self.include_all:
+            return True
+        if resolver is not None and {resolver.namespace, resolver.app_name} & self.include_names:
+            return True
+        return self.include_pattern is not None and self.include_pattern.match(path) is not None
+
+    def is_excluded(self, path: UrlPath, resolver: Optional[URLResolver] = None) -> bool:
+        if resolver is not None and {resolver.namespace, resolver.app_name} & self.exclude_names:
+            return True
+        return self.exclude_pattern is not None and self.exclude_pattern.match(path) is not None
+
+    def includes_endpoint(self, path: UrlPath, *, included: bool = False) -> bool:
+        """
+        Is the endpoint at the given path included?
+
+        :param path: Path of the endpoint.
+        :param included: Whether the URL conf of the endpoint is included as a whole.
+        """
+        return not self.is_excluded(path) and (included or self.is_included(path))
+
+    def may_include(self, path: UrlPath) -> bool:
+        """Can the URL conf included at the given path contain included endpoints?"""
+        # Namespaces of the URL confs included in it are only known by inspecting it.
+        return bool(self.include_names) or any(prefix.startswith(path) for prefix in self.include_prefixes)
+
+
+def split_url_filters(filters: Sequence[str]) -> tuple[frozenset[str], tuple[UrlPath, ...]]:
+    names = frozenset(item for item in filters if not item.startswith("/"))
+    prefixes = tuple(item for item in filters if item.startswith("/"))
+    return names, prefixes
+
+
+def compile_path_prefixes(prefixes: Sequence[UrlPath]) -> Optional[re.Pattern[str]]:
+    if not prefixes:
+        return None
+    return re.compile("|".join(re.escape(prefix) for prefix in prefixes))
+
+
 def get_api_endpoints(
     patterns: list[Union[URLPattern, URLResolver]],
     root: UrlPath,
-    request: Optional[Request],
-) -> list[tuple[UrlPath, HTTPMethod, CompatibleView]]:
-    api_endpoints: list[tuple[UrlPath, HTTPMethod, CompatibleView]] = []
+    url_filter: Optional[URLFilter] = None,
+    routers: Optional[dict[UrlPath, SimpleRouter]] = None,
+) -> list[Endpoint]:
+    """
+    Find the API endpoints in the given URL patterns.
+
+    :param patterns: URL patterns to inspect.
+    :param root: Path prefix for the patterns.
+    :param url_filter: Filter for the patterns to inspect. Inspect all if not given.
+    :param routers: Routers by the path prefix their URLs are included with. Endpoints for these routers
+                    are read from their registries, and their URL patterns are skipped.
+    """
+    api_endpoints: list[Endpoint] = []
+    routed_urlconfs: set[int] = set()
+    routed_patterns: set[int] = set()
 
-    for pattern in patterns:
-        path = simplify_regex(str(pattern.pattern))
-        if not path.endswith("/"):
-            path += "/"
-        if not path.startswith(root):
-            path = root + path
+    for prefix, router in (routers or {}).items():
+        routed_urlconfs.add(id(router.urls))
+        routed_patterns.update(id(pattern) for pattern in router.urls)
+
+        api_endpoints += get_router_endpoints(router, prefix, root, url_filter)
+
+    # Patterns to inspect with their path prefix, and whether the filter includes them as a whole.
+    # Reversed so that patterns are inspected in order, as if recursing into included URL confs.
+    stack: list[tuple[Union[URLPattern, URLResolver], UrlPath, bool]] = [
+        (pattern, root, False) for pattern in reversed(patterns)
+    ]
+
+    while stack:
+        pattern, prefix, included = stack.pop()
+        if id(pattern) in routed_patterns or id(getattr(pattern, "urlconf_name", None)) in routed_urlconfs:
+            continue
+
+        path = get_pattern_path(pattern, prefix)
 
         if isinstance(pattern, URLPattern):
-            path = re.sub(path_parameter_pattern, r"{\g<parameter>}", path)
             callback: AsView = pattern.callback  # type: ignore[assignment]
 
+            if url_filter is not None and not url_filter.includes_endpoint(path, included=included):
+                continue
+
             if should_include_endpoint(path, callback):
-                for method in get_methods(callback):
-                    view = create_view(callback, method, request)
-                    api_endpoints.append((path, method, view))
+                api_endpoints += (Endpoint(path, method, callback) for method in get_methods(callback))
 
         elif isinstance(pattern, URLResolver):  # pragma: no cover
-            api_endpoints += get_api_endpoints(
-                patterns=pattern.url_patterns,
-                root=path.removesuffix("/"),
-                request=request,
-            )
+            nested_included = included
+            if url_filter is not None:
+                if url_filter.is_excluded(path, pattern):
+                    continue
+                nested_included = included or url_filter.is_included(path, pattern)
+                if not nested_included and not url_filter.may_include(path):
+                    continue
 
-    return sorted(api_endpoints, key=endpoint_ordering)
+            nested_prefix = path.removesuffix("/")
+            stack += ((nested, nested_prefix, nested_included) for nested in reversed(pattern.url_patterns))
+
+    api_endpoints.sort(key=endpoint_ordering)
+    return api_endpoints
+
+
+# Normalized paths of URL patterns by the path prefix they are included with.
+normalized_paths: MutableMapping[Union[URLPattern, URLResolver], dict[UrlPath, UrlPath]] = WeakKeyDictionary()
+
+
+def get_pattern_path(pattern: Union[URLPattern, URLResolver], prefix: UrlPath) -> UrlPath:
+    paths = normalized_paths.get(pattern)
+    if paths is None:
+        paths = normalized_paths[pattern] = {}
+
+    path = paths.get(prefix)
+    if path is None:
+        path = paths[prefix] = normalize_path(str(pattern.pattern), prefix, parameters=isinstance(pattern, URLPattern))
+
+    return path
+
+
+def normalize_path(route: str, prefix: UrlPath, *, parameters: bool = True) -> UrlPath:
+    """
+    Normalize the URL pattern route into an OpenAPI path.
+
+    :param route: Route or regex of the URL pattern.
+    :param prefix: Path prefix for the URL pattern.
+    :param parameters: Convert path parameters to OpenAPI format, e.g., '<int:pk>' to '{pk}'.
+    """
+    path = simplify_regex(route)
+    if not path.endswith("/"):
+        path += "/"
+    if not path.startswith(prefix):
+        path = prefix + path
+    if parameters:
+        path = path_parameter_pattern.sub(r"{\g<parameter>}", path)
+    return path
+
+
+def get_router_endpoints(
+    router: SimpleRouter,
+    prefix: UrlPath,
+    root: UrlPath,
+    url_filter: Optional[URLFilter] = None,
+) -> Generator[Endpoint, Any, None]:
+    """
+    Get the endpoints for the viewsets registered to the router, as 'get_api_endpoints' would find them
+    from the router's URL patterns, but without simplifying each URL regex.
+
+    :param router: Router to get the endpoints for.
+    :param prefix: Path prefix the router's URLs are included with.
+    :param root: Path prefix for all endpoints.
+    :param url_filter: Filter for the endpoints. Include all if not given.
+    """
+    # Path of the URL conf including the router's URLs.
+    base = normalize_path(prefix.strip("/"), root, parameters=False).removesuffix("/")
+
+    # Lookup regex of each viewset, and the path parameter it is converted to in the path.
+    lookups: dict[type[APIView], tuple[str, str]] = {}
+
+    for pattern in router.urls:
+        callback: AsView = pattern.callback  # type: ignore[assignment]
+        if not hasattr(callback, "cls") or not isinstance(pattern, URLPattern):
+            continue
+
+        paths = router_paths.get(pattern)
+        if paths is None:
+            paths = router_paths[pattern] = {}
+        if base not in paths:
+            paths[base] = get_router_path(router, pattern, base, lookups)
+
+        path = paths[base]
+        if path is None:
+            continue
+
+        if url_filter is not None and not url_filter.includes_endpoint(path):
+            continue
+
+        if should_include_endpoint(path, callback):
+            yield from (Endpoint(path, method, callback) for method in get_methods(callback))
+
+
+# Paths of router URL patterns by the path prefix they are included with. None for format suffix patterns.
+router_paths: MutableMapping[URLPattern, dict[UrlPath, Optional[UrlPath]]] = WeakKeyDictionary()
+
+
+def get_router_path(
+    router: SimpleRouter,
+    pattern: URLPattern,
+    base: UrlPath,
+    lookups: dict[type[APIView], tuple[str, str]],
+) -> Optional[UrlPath]:
+    route = str(pattern.pattern)
+    if format_suffix_pattern.search(route) is not None:
+        return None
+
+    view_class: type[APIView] = pattern.callback.cls  # type: ignore[attr-defined]
+    lookup = lookups.get(view_class)
+    if lookup is None:
+        lookup_regex = router.get_lookup_regex(view_class)
+        lookup = lookups[view_class] = lookup_regex, normalize_path(lookup_regex, "").strip("/")
+
+    url = route.replace(lookup[0], lookup[1]).removeprefix("^").removesuffix("$")
+    if router_url_pattern.search(url) is not None:
+        # Regex in the viewset prefix or an action's URL path needs to be simplified.
+        return get_pattern_path(pattern, base)
+
+    path = "/" + url
+    if not path.endswith("/"):
+        path += "/"
+    if not path.startswith(base):
+        path = base + path
+    return path
 
 
 def should_include_endpoint(path: UrlPath, callback: AsView) -> bool:  # pragma: no cover
@@ -312,23 +951,43 @@ def get_methods(callback: AsView) -> list[HTTPMethod]:
         http_method_names = set(callback.cls.http_method_names)
         methods = [method.upper() for method in actions & http_method_names]
     else:
-        methods = callback.cls().allowed_methods
+        http_method_names = callback.initkwargs.get("http_method_names", callback.cls.http_method_names)
+        methods = get_allowed_methods(callback.cls, tuple(http_method_names))
 
     return [method for method in methods if method not in ("OPTIONS", "HEAD")]
 
 
+def get_allowed_methods(view_class: type[APIView], http_method_names: tuple[str, ...]) -> tuple[HTTPMethod, ...]:
+    """
+    Get the methods the view class has handlers for, like 'View.allowed_methods' does for view instances.
+    Read from the class so that views do not need to be instantiated for this.
+
+    :param view_class: View class to check.
+    :param http_method_names: HTTP method names the view accepts.
+    """
+    key = (view_class, http_method_names)
+    methods = allowed_methods.get(key)
+    if methods is None:
+        methods = tuple(method.upper() for method in http_method_names if hasattr(view_class, method))
+        allowed_methods[key] = methods
+    return methods
+
+
 def create_view(callback: AsView, method: HTTPMethod, request: Optional[Request]) -> CompatibleView:
     view = callback.cls(**callback.initkwargs)
     view.args = ()  # type: ignore[attr-defined]
     view.kwargs = {}  # type: ignore[attr-defined]
     view.format_kwarg = None  # type: ignore[attr-defined]
-    view.request = clone_request(request, method) if request is not None else None
+    bind_view(view, method, request)
     return view
 
 
-def endpoint_ordering(endpoint: tuple[UrlPath, HTTPMethod, CompatibleView]) -> tuple[UrlPath, int]:
-    method_priority = {"GET": 0, "POST": 1, "PUT": 2, "PATCH": 3, "DELETE": 4}.get(endpoint[1], 5)
-    return endpoint[0], method_priority
+def bind_view(view: CompatibleView, method: HTTPMethod, request: Optional[Request]) -> None:
+    view.request = clone_request(request, method) if request is not None else None
+
+
+def endpoint_ordering(endpoint: Endpoint) -> tuple[UrlPath, int]:
+    return endpoint.path, endpoint.priority
 
 
 def get_local_path(path: UrlPath, root_url: UrlPath) -> UrlPath:
@@ -338,6 +997,126 @@ def get_local_path(path: UrlPath, root_url: UrlPath) -> UrlPath:
     return path.removeprefix("/")
 
 
+def get_source_fingerprint(classes: Iterable[type]) -> str:
+    """Hash the source files of the modules defining the given classes and their base classes."""
+    paths: set[str] = set()
+    for cls in classes:
+        for base in cls.__mro__:
+            path = getattr(sys.modules.get(base.__module__), "__file__", None)
+            if path is not None:
+                paths.add(path)
+
+    digest = sha256()
+    for path in sorted(paths):
+        fingerprint = source_fingerprints.get(path)
+        if fingerprint is None:
+            try:
+                content = Path(path).read_bytes()
+            except OSError:  # pragma: no cover
+                content = b""
+            fingerprint = source_fingerprints[path] = sha256(content).hexdigest()
+        digest.update(f"{path}:{fingerprint}\n".encode())
+    return digest.hexdigest()
+
+
+def get_serializer_classes(value: Any) -> set[type]:
+    """
+    Find the serializer classes in the given value, e.g., a schema's options,
+    the serializers nested in them, and the models of model serializers.
+    """
+    classes: set[type] = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif isinstance(item, ListSerializer):
+            stack.append(getattr(item, "child", None))
+        elif isinstance(item, Serializer):
+            stack.append(item.__class__)
+        elif is_serializer_class(item) and item not in classes:
+            classes.add(item)
+            stack.extend(getattr(item, "_declared_fields", {}).values())
+            model = getattr(getattr(item, "Meta", None), "model", None)
+            if isinstance(model, type):
+                classes.add(model)
+    return classes
+
+
+def get_component_references(schema: Any) -> set[ComponentName]:
+    """Find the names of the components referenced in the given schema."""
+    names: set[ComponentName] = set()
+    stack = [schema]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            reference = item.get("$ref")
+            if isinstance(reference, str) and reference.startswith(component_reference_prefix):
+                names.add(reference.removeprefix(component_reference_prefix))
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return names
+
+
+def close_connections_after(function: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run the function in a background thread, and close the thread's database connections afterward,
+    since Django only closes connections at the end of requests.
+
+    :returns: The result of the function.
+    """
+    try:
+        return function(*args)
+    finally:
+        connections.close_all()
+
+
+def get_dotted_path(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def get_config_repr(value: Any) -> str:
+    """Represent the given configuration without memory addresses, which change between processes."""
+    return object_address_pattern.sub("", repr(value))
+
+
+def get_schema_fingerprint(schema: OpenAPI) -> str:
+    """Hash the content of the given schema, independent of its key order."""
+    content = json.dumps(schema, sort_keys=True, default=str, separators=(",", ":"))
+    return sha256(content.encode()).hexdigest()
+
+
+def get_content_type(renderer: BaseRenderer) -> str:
+    if renderer.charset is None:
+        return renderer.media_type
+    return f"{renderer.media_type}; charset={renderer.charset}"
+
+
+def get_accepted_encoding(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """Pick the content encoding the client prefers the most from the given encodings."""
+    preferences: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                with suppress(ValueError):
+                    quality = float(value)
+        preferences[coding.strip().lower()] = quality
+
+    accepted: Optional[str] = None
+    best_quality = 0.0
+    for encoding in encodings:
+        quality = preferences.get(encoding, preferences.get("*", 0.0))
+        if quality > best_quality:
+            accepted, best_quality = encoding, quality
+    return accepted
+
+
 def get_path_parameters(path: UrlPath) -> Generator[str, Any, None]:
     for match in url_variables_pattern.finditer(path):
         yield match.groups()[0]
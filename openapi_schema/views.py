@@ -1,12 +1,23 @@
+from importlib import import_module
+from pathlib import Path
+from threading import Thread
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseBase
+from django.test import RequestFactory
 from django.urls import URLPattern, URLResolver
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.permissions import BasePermission
 from rest_framework.renderers import BrowsableAPIRenderer, JSONOpenAPIRenderer, OpenAPIRenderer
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.routers import SimpleRouter
 from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
+from .cache import CachedSchema, SchemaCache, schema_cache
 from .generator import OpenAPISchemaGenerator
 from .typing import (
     Any,
@@ -21,26 +32,186 @@ from .typing import (
     SchemaWebhook,
     SchemeName,
     SecurityRules,
+    Sequence,
     Union,
     UrlPath,
 )
+from .utils import (
+    close_connections_after,
+    content_encoders,
+    content_encoding_suffixes,
+    get_accepted_encoding,
+    get_content_type,
+)
+
+
+class CachedSchemaResponse(Response):
+    """Response that reuses the rendered content stored in the cached schema."""
+
+    def __init__(self, cached: CachedSchema, **kwargs: Any) -> None:
+        super().__init__(data=cached.schema, **kwargs)
+        self.cached = cached
+
+    @property
+    def rendered_content(self) -> bytes:
+        renderer = getattr(self, "accepted_renderer", None)
+        # Browsable API content depends on the request, so it cannot be reused.
+        if renderer is None or isinstance(renderer, BrowsableAPIRenderer):
+            return super().rendered_content
+
+        self["Content-Type"] = self.content_type or get_content_type(renderer)
+        return self.cached.render(renderer, self.renderer_context)
 
 
 class OpenAPISchemaView(APIView):
     _ignore_model_permissions: bool = True
     schema = None  # exclude from schema
     schema_generator = OpenAPISchemaGenerator()
+    schema_cache: Optional[SchemaCache] = None
     renderer_classes = [OpenAPIRenderer, JSONOpenAPIRenderer]
     public: bool = True
+    conditional: bool = False
+    cache_control: Optional[str] = None
+    prerendered: bool = False
+    compress: bool = False
+    schema_file: Optional[Union[str, Path]] = None
 
     def __init__(self, **kwargs: Any) -> None:
         super().__init__(**kwargs)
         if BrowsableAPIRenderer in api_settings.DEFAULT_RENDERER_CLASSES:
             self.renderer_classes += [BrowsableAPIRenderer]
 
-    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
-        schema = self.schema_generator.get_schema(request, self.public)
-        return Response(schema)
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        response = self.get_file_response(request)
+        if response is not None:
+            return response
+
+        cached = self.get_cached_schema(request)
+        if not self.conditional or isinstance(request.accepted_renderer, BrowsableAPIRenderer):
+            return self.get_schema_response(request, cached)
+
+        etag = self.get_etag(request, cached)
+        response = get_conditional_response(request, etag=etag, last_modified=cached.generated_at)
+        if response is None:
+            response = self.get_schema_response(request, cached)
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(cached.generated_at)
+        return response
+
+    def get_schema_response(self, request: Request, cached: CachedSchema) -> HttpResponseBase:
+        renderer = request.accepted_renderer
+        if not self.prerendered or isinstance(renderer, BrowsableAPIRenderer):
+            return CachedSchemaResponse(cached)
+
+        # Serve the rendered bytes directly, skipping the rendering done by DRF responses.
+        encoding = self.get_content_encoding(request)
+        if encoding is None:
+            return HttpResponse(cached.render(renderer), content_type=get_content_type(renderer))
+
+        response = HttpResponse(cached.compress(renderer, encoding), content_type=get_content_type(renderer))
+        response["Content-Encoding"] = encoding
+        return response
+
+    def get_file_response(self, request: Request) -> Optional[HttpResponseBase]:
+        """Serve the prebuilt schema file if it exists and matches the negotiated renderer."""
+        if self.schema_file is None:
+            return None
+
+        path = Path(self.schema_file)
+        renderer = request.accepted_renderer
+        if renderer.media_type != get_schema_file_media_type(path) or not path.is_file():
+            return None
+
+        modified = path.stat().st_mtime
+        last_modified = int(modified)
+        if self.conditional:
+            response = get_conditional_response(request, last_modified=last_modified)
+            if response is not None:
+                response["Last-Modified"] = http_date(last_modified)
+                return response
+
+        encoding: Optional[str] = None
+        if self.compress:
+            # Compressed copies older than the schema file are left over from a previous build.
+            encodings = [
+                encoding
+                for encoding, suffix in content_encoding_suffixes.items()
+                if (compressed := path.with_name(path.name + suffix)).is_file()
+                and compressed.stat().st_mtime >= modified
+            ]
+            encoding = get_accepted_encoding(request.headers.get("Accept-Encoding", ""), encodings)
+            if encoding is not None:
+                path = path.with_name(path.name + content_encoding_suffixes[encoding])
+
+        response = FileResponse(path.open("rb"), content_type=get_content_type(renderer))
+        if encoding is not None:
+            response["Content-Encoding"] = encoding
+        if self.conditional:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def get_content_encoding(self, request: Request) -> Optional[str]:
+        if not self.compress or not self.prerendered or isinstance(request.accepted_renderer, BrowsableAPIRenderer):
+            return None
+        return get_accepted_encoding(request.headers.get("Accept-Encoding", ""), list(content_encoders))
+
+    def get_cached_schema(self, request: Request) -> CachedSchema:
+        # Private schemas depend on the requesting user, so they are never cached.
+        if self.schema_cache is None or not self.public:
+            return CachedSchema(self.schema_generator.get_schema(request, self.public))
+
+        return self.schema_cache.get_or_generate(
+            key=self.get_cache_key(request),
+            generate=lambda: self.schema_generator.get_schema(request, self.public),
+        )
+
+    def get_cache_key(self, request: Request) -> tuple[str, bool, str]:
+        urlconf = getattr(request, "urlconf", None) or settings.ROOT_URLCONF
+        return self.schema_generator.cache_key, bool(self.public), getattr(urlconf, "__name__", str(urlconf))
+
+    def warm(self, request: Request) -> None:
+        """
+        Discover the endpoints, and generate and render the schema to each media type ahead of the first request.
+        Only the endpoint discovery is kept for private or uncached schemas.
+        """
+        self.schema_generator.get_endpoints()
+        if self.schema_cache is None or not self.public:
+            return
+
+        cached = self.get_cached_schema(request)
+        if self.conditional:
+            cached.fingerprint  # noqa: B018
+        for renderer_class in self.renderer_classes:
+            if issubclass(renderer_class, BrowsableAPIRenderer):
+                continue
+            renderer = renderer_class()
+            cached.render(renderer)
+            if self.compress and self.prerendered:
+                for encoding in content_encoders:
+                    cached.compress(renderer, encoding)
+
+    def get_etag(self, request: Request, cached: CachedSchema) -> str:
+        # Each representation of the schema needs its own entity tag.
+        etag = f"{cached.fingerprint}-{request.accepted_renderer.format}"
+        encoding = self.get_content_encoding(request)
+        if encoding is not None:
+            etag += f"-{encoding}"
+        return quote_etag(etag)
+
+    def finalize_response(
+        self,
+        request: Request,
+        response: HttpResponseBase,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.cache_control is not None and response.status_code in {200, 304}:
+            response["Cache-Control"] = self.cache_control
+        if self.compress and (self.prerendered or self.schema_file is not None):
+            patch_vary_headers(response, ["Accept-Encoding"])
+        return response
 
     def handle_exception(self, exc: Exception) -> Response:  # pragma: no cover
         # Schema renderers do not render exceptions, so re-perform content
@@ -68,6 +239,21 @@ def get_schema_view(  # noqa: PLR0913
     security_rules: Optional[SecurityRules] = None,
     authentication_classes: Optional[list[type[BaseAuthentication]]] = None,
     permission_classes: Optional[list[type[BasePermission]]] = None,
+    cache: Union[bool, SchemaCache] = False,
+    conditional: bool = False,
+    cache_control: Optional[str] = None,
+    prerendered: bool = False,
+    compress: bool = False,
+    schema_file: Optional[Union[str, Path]] = None,
+    cache_serializers: bool = False,
+    nested_components: bool = False,
+    share_views: bool = False,
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None,
+    routers: Optional[dict[UrlPath, SimpleRouter]] = None,
+    max_workers: Optional[int] = None,
+    fragment_cache_dir: Optional[Union[str, Path]] = None,
+    incremental: bool = False,
 ) -> AsView[GenericView]:
     """
     Return a schema view.
@@ -90,6 +276,37 @@ def get_schema_view(  # noqa: PLR0913
                            permission class(es) exist on an endpoint.
     :param authentication_classes: Authentication classes for the OpenAPI SchemaView.
     :param permission_classes: Permission classes for the OpenAPI SchemaView.
+    :param cache: Cache the generated and rendered schema in the process-wide schema cache,
+                  or in the given schema cache, e.g., a 'DjangoSchemaCache' shared between processes.
+                  Only public schemas are cached.
+    :param conditional: Add ETag and Last-Modified headers to the schema response, and
+                        answer conditional requests with 304 Not Modified.
+    :param cache_control: Value for the Cache-Control header of the schema response, e.g., "max-age=60".
+    :param prerendered: Serve the rendered schema bytes directly instead of rendering a DRF Response.
+                        Use with 'cache' to render the schema only once per media type.
+    :param compress: Serve gzip or deflate compressed schema bytes based on the Accept-Encoding header.
+                     Compressed variants are stored alongside the rendered bytes. Requires 'prerendered'
+                     or 'schema_file'.
+    :param schema_file: Prebuilt schema file to serve instead of generating the schema, e.g., one created with
+                        the 'generate_openapi_schema' management command. Served only for requests accepting
+                        the file's format (JSON for '.json' files, YAML otherwise). Falls back to generating
+                        the schema if the file does not exist.
+    :param cache_serializers: Keep serializer schemas in a process-wide cache between schema generations.
+    :param nested_components: Add nested serializers to the schema components and reference them,
+                              instead of inlining them into every schema they are used in.
+    :param share_views: Create one view per URL pattern for all of its HTTP methods during endpoint discovery,
+                        instead of a view per method.
+    :param include: Only include endpoints from URL confs included with these namespaces or app names,
+                    or with paths starting with these prefixes (filters starting with '/').
+    :param exclude: Exclude endpoints from URL confs included with these namespaces or app names,
+                    or with paths starting with these prefixes (filters starting with '/').
+    :param routers: Routers by the path prefix their URLs are included with, e.g., {"/api": router}.
+                    Endpoints for these routers are read directly from their registries.
+    :param max_workers: Generate the operations in a thread pool with this many threads.
+    :param fragment_cache_dir: Directory to keep the generated operations in between processes,
+                               so that only operations whose code or options changed are generated again.
+    :param incremental: Keep the operations of the schema between generations, so that invalidating the
+                        cached schema for a serializer only generates the operations using it again.
     """
     generator = OpenAPISchemaGenerator(
         title=title,
@@ -104,11 +321,26 @@ def get_schema_view(  # noqa: PLR0913
         security_schemes=security_schemes,
         security_rules=security_rules,
         terms_of_service=terms_of_service,
+        cache_serializers=cache_serializers,
+        nested_components=nested_components,
+        share_views=share_views,
+        include=include,
+        exclude=exclude,
+        routers=routers,
+        max_workers=max_workers,
+        fragment_cache_dir=fragment_cache_dir,
+        incremental=incremental,
     )
 
     return OpenAPISchemaView.as_view(
         schema_generator=generator,
         public=public,
+        schema_cache=cache if isinstance(cache, SchemaCache) else schema_cache if cache else None,
+        conditional=conditional,
+        cache_control=cache_control,
+        prerendered=prerendered,
+        compress=compress,
+        schema_file=schema_file,
         authentication_classes=(
             authentication_classes
             if authentication_classes is not None
@@ -118,3 +350,72 @@ def get_schema_view(  # noqa: PLR0913
             permission_classes if permission_classes is not None else api_settings.DEFAULT_PERMISSION_CLASSES
         ),
     )
+
+
+def get_schema_file_media_type(path: Path) -> str:
+    if path.suffix == ".json":
+        return JSONOpenAPIRenderer.media_type
+    return OpenAPIRenderer.media_type
+
+
+def get_schema_views(patterns: list[Union[URLPattern, URLResolver]]) -> list[AsView]:
+    """Find the schema views in the given URL patterns, including each view only once."""
+    views: dict[int, AsView] = {}
+    stack = list(reversed(patterns))
+    while stack:
+        pattern = stack.pop()
+        if isinstance(pattern, URLResolver):
+            stack.extend(reversed(pattern.url_patterns))
+            continue
+
+        view_class = getattr(pattern.callback, "view_class", None)
+        if isinstance(view_class, type) and issubclass(view_class, OpenAPISchemaView):
+            views.setdefault(id(pattern.callback), pattern.callback)
+    return list(views.values())
+
+
+def warm(urlconf: Optional[Union[str, ModuleType]] = None) -> int:
+    """
+    Generate and render the schemas of all schema views in the URL conf.
+
+    Call this before forking worker processes, e.g., in a WSGI module loaded with 'gunicorn --preload',
+    so that the workers share the generated schemas instead of each generating them on its first request.
+    Also called when the app is ready if the 'OPENAPI_SCHEMA_WARM_UP' setting is True,
+    or in a background thread if it is "background".
+
+    :param urlconf: URL conf module to find the schema views in. Defaults to settings.ROOT_URLCONF.
+    :returns: Number of schema views warmed up.
+    """
+    from django.contrib.auth.models import AnonymousUser  # noqa: PLC0415
+
+    if urlconf is None:
+        urlconf = settings.ROOT_URLCONF
+    module = import_module(urlconf) if isinstance(urlconf, str) else urlconf
+
+    # Requests for the schema views resolve with the same URL conf, so the schemas are cached under the same key.
+    http_request = RequestFactory().get("/")
+    http_request.urlconf = module.__name__
+    request = Request(http_request)
+    request.user = AnonymousUser()
+
+    views = get_schema_views(module.urlpatterns)
+    for view in views:
+        view.view_class(**view.view_initkwargs).warm(request)
+    return len(views)
+
+
+def warm_in_background(urlconf: Optional[Union[str, ModuleType]] = None) -> Thread:
+    """
+    Warm up the schema views in a background thread, see 'warm'.
+
+    For deployments that do not load the app before forking workers, so that each worker starts generating
+    the schemas at startup while serving other requests. Requests for a schema still being generated wait for it.
+    """
+    thread = Thread(
+        target=close_connections_after,
+        args=(warm, urlconf),
+        name="openapi-schema-warm-up",
+        daemon=True,
+    )
+    thread.start()
+    return thread
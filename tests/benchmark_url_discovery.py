@@ -0,0 +1,59 @@
+"""
+Micro-benchmark for finding API endpoints from URL patterns.
+
+Run with: python -m tests.benchmark_url_discovery [--routers N] [--repeat N]
+"""
+
+import os
+from argparse import ArgumentParser
+from timeit import repeat, timeit
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.project.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.urls import URLPattern, URLResolver, include, path  # noqa: E402
+from rest_framework.routers import DefaultRouter  # noqa: E402
+
+from openapi_schema.typing import Union  # noqa: E402
+from openapi_schema.utils import get_api_endpoints, normalized_paths, router_paths  # noqa: E402
+from tests.project.urls import PlainViewSet, UserViewSet  # noqa: E402
+
+
+def build_patterns(count: int) -> tuple[list[Union[URLPattern, URLResolver]], dict[str, DefaultRouter]]:
+    patterns: list[Union[URLPattern, URLResolver]] = []
+    routers: dict[str, DefaultRouter] = {}
+    for number in range(count):
+        router = DefaultRouter()
+        router.register(r"plain/viewset", PlainViewSet, basename=f"plain-{number}")
+        router.register(r"users", UserViewSet, basename=f"users-{number}")
+        patterns.append(path(f"api/v{number}/", include(router.urls)))
+        routers[f"/api/v{number}"] = router
+    return patterns, routers
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--routers", type=int, default=200, help="Number of routers to include.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs.")
+    args = parser.parse_args()
+
+    patterns, routers = build_patterns(args.routers)
+    endpoints = get_api_endpoints(patterns, root="/")
+
+    print(f"Found {len(endpoints)} endpoints from {args.routers} routers.")  # noqa: T201
+
+    for name, kwargs in (("URL patterns", {}), ("Router registries", {"routers": routers})):
+        normalized_paths.clear()
+        router_paths.clear()
+        cold = timeit(lambda kwargs=kwargs: get_api_endpoints(patterns, root="/", **kwargs), number=1)
+        warm = min(
+            repeat(lambda kwargs=kwargs: get_api_endpoints(patterns, root="/", **kwargs), number=1, repeat=args.repeat),
+        )
+        print(f"{name}: cold {cold * 1000:.1f}ms, warm {warm * 1000:.1f}ms (best of {args.repeat}).")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
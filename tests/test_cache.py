@@ -0,0 +1,257 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from threading import Event, current_thread
+from time import sleep
+
+from django.core.cache import cache as default_cache
+from django.db import connections
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONOpenAPIRenderer
+
+from openapi_schema.cache import DjangoSchemaCache, FragmentCache, SchemaCache
+
+
+class Calls(list):
+    """Calls to generate the schema, with an event set on the first call."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = Event()
+
+    def append(self, item):
+        super().append(item)
+        self.started.set()
+
+
+def generate_after(event, calls):
+    def generate():
+        calls.append(None)
+        event.wait(5)
+        return {"openapi": "3.0.2", "info": {"title": "Test", "version": ""}}
+
+    return generate
+
+
+def generate_now(calls):
+    ready = Event()
+    ready.set()
+    return generate_after(ready, calls)
+
+
+def test_schema_cache__single_flight():
+    cache = SchemaCache()
+    release, calls = Event(), Calls()
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(cache.get_or_generate, "key", generate_after(release, calls)) for _ in range(5)]
+        assert calls.started.wait(5)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert cache.generating == {}
+
+
+def test_schema_cache__single_flight__wait_timeout():
+    cache = SchemaCache(wait_timeout=0)
+    release, calls = Event(), Calls()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(cache.get_or_generate, "key", generate_after(release, calls))
+        assert calls.started.wait(5)
+        second = cache.get_or_generate("key", lambda: {"openapi": "3.0.2"})
+        release.set()
+
+    assert second.schema == {"openapi": "3.0.2"}
+    assert first.result().schema["info"]["title"] == "Test"
+
+
+def test_schema_cache__file_lock(tmp_path):
+    # Caches of two processes sharing the lock directory.
+    first, second = SchemaCache(lock_dir=tmp_path), SchemaCache(lock_dir=tmp_path)
+    release, first_calls, second_calls = Event(), Calls(), Calls()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first_result = executor.submit(first.get_or_generate, "key", generate_after(release, first_calls))
+        assert first_calls.started.wait(5)
+        second_result = executor.submit(second.get_or_generate, "key", generate_after(Event(), second_calls))
+        # Let the second cache start waiting for the lock.
+        sleep(0.2)
+        release.set()
+
+    assert first_result.result().schema == second_result.result().schema
+    assert len(first_calls) == 1
+    assert second_calls == []
+
+
+def test_schema_cache__stale_while_revalidate():
+    cache = SchemaCache(ttl=60)
+    release, calls = Event(), Calls()
+    stale = cache.get_or_generate("key", generate_now(calls))
+    stale.generated_at -= 60
+
+    # The stale schema is returned while a fresh one is generated in the background.
+    assert cache.get_or_generate("key", generate_after(release, calls)) is stale
+    assert cache.get_or_generate("key", generate_after(release, calls)) is stale
+    refreshed = cache.generating["key"]
+    release.set()
+    assert refreshed.wait(5)
+
+    fresh = cache.get_or_generate("key", generate_now(calls))
+    assert fresh is not stale
+    assert not cache.is_stale(fresh)
+    assert len(calls) == 2
+
+
+def test_schema_cache__refresh__closes_connections(monkeypatch):
+    closed = []
+    monkeypatch.setattr(connections, "close_all", lambda: closed.append(current_thread()))
+    cache = SchemaCache()
+
+    thread = cache.refresh("key", generate_now([]))
+    thread.join(5)
+
+    assert closed == [thread]
+    assert cache.get("key") is not None
+
+
+def generate_in_two_processes(tmp_path, values):
+    first, second = SchemaCache(lock_dir=tmp_path), SchemaCache(lock_dir=tmp_path)
+    release, first_calls, second_calls = Event(), Calls(), []
+
+    def generate():
+        first_calls.append(None)
+        release.wait(5)
+        return {"openapi": "3.0.2", "components": {"schemas": {"Price": values}}}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first_result = executor.submit(first.get_or_generate, "key", generate)
+        assert first_calls.started.wait(5)
+        second_result = executor.submit(second.get_or_generate, "key", generate_now(second_calls))
+        sleep(0.2)
+        release.set()
+
+    return first_result.result().schema, second_result.result().schema, len(first_calls) + len(second_calls)
+
+
+def test_schema_cache__file_lock__exact_values(tmp_path):
+    values = {"maximum": Decimal("100"), "minimum": 0.5}
+
+    first, second, calls = generate_in_two_processes(tmp_path, values)
+
+    # The waiting process gets the same values, not their JSON representations.
+    price = second["components"]["schemas"]["Price"]
+    assert price == first["components"]["schemas"]["Price"]
+    assert isinstance(price["maximum"], Decimal)
+    assert calls == 1
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+def test_schema_cache__file_lock__inexact_values(tmp_path):
+    values = {"maximum": Decimal("100"), "description": gettext_lazy("Price")}
+
+    first, second, calls = generate_in_two_processes(tmp_path, values)
+
+    # Not stored, so the waiting process generates the schema on its own.
+    assert first["components"]["schemas"]["Price"] == values
+    assert "components" not in second
+    assert calls == 2
+
+
+def test_django_schema_cache__shared():
+    default_cache.clear()
+    # Caches of two processes sharing the Django cache.
+    first, second = DjangoSchemaCache(), DjangoSchemaCache()
+    calls = []
+
+    first_cached = first.get_or_generate("key", generate_now(calls))
+    content = first_cached.render(JSONOpenAPIRenderer())
+    second_cached = second.get_or_generate("key", generate_now(calls))
+
+    assert len(calls) == 1
+    assert second_cached.schema == first_cached.schema
+    assert second_cached.rendered == {"application/vnd.oai.openapi+json": content}
+    assert second_cached.generated_at == first_cached.generated_at
+
+
+def test_django_schema_cache__versioned():
+    default_cache.clear()
+    calls = []
+
+    DjangoSchemaCache(version="1").get_or_generate("key", generate_now(calls))
+    DjangoSchemaCache(version="2").get_or_generate("key", generate_now(calls))
+
+    assert len(calls) == 2
+
+
+def test_django_schema_cache__waits_for_lock():
+    default_cache.clear()
+    first, second = DjangoSchemaCache(), DjangoSchemaCache()
+    release, first_calls, second_calls = Event(), Calls(), Calls()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first_result = executor.submit(first.get_or_generate, "key", generate_after(release, first_calls))
+        assert first_calls.started.wait(5)
+        second_result = executor.submit(second.get_or_generate, "key", generate_after(Event(), second_calls))
+        # Let the second cache start polling the shared key.
+        sleep(0.2)
+        release.set()
+
+    assert first_result.result().schema == second_result.result().schema
+    assert len(first_calls) == 1
+    assert second_calls == []
+    assert default_cache.get(f"{first.get_shared_key('key')}:lock") is None
+
+
+def test_django_schema_cache__invalidate():
+    default_cache.clear()
+    first, second = DjangoSchemaCache(), DjangoSchemaCache()
+    calls = []
+
+    first.get_or_generate("key", generate_now(calls))
+    first.clear()
+    second.get_or_generate("key", generate_now(calls))
+
+    assert len(calls) == 2
+
+
+def test_django_schema_cache__stale():
+    default_cache.clear()
+    calls = []
+
+    cached = DjangoSchemaCache(ttl=60).get_or_generate("key", generate_now(calls))
+    cached.generated_at -= 60
+    cached.render(JSONOpenAPIRenderer())
+    DjangoSchemaCache(ttl=60).get_or_generate("key", generate_now(calls))
+
+    assert len(calls) == 2
+
+
+def test_fragment_cache(tmp_path):
+    cache = FragmentCache(tmp_path)
+    fragment = {
+        "path": "/prices/",
+        "method": "POST",
+        "operation": {"operationId": "createPrice"},
+        "components": {"Price": {"type": "number", "maximum": Decimal("100.50"), "nullable": True}},
+        "references": ["Price"],
+    }
+
+    cache.set("key", fragment)
+
+    assert cache.get("key") == fragment
+    assert isinstance(cache.get("key")["components"]["Price"]["maximum"], Decimal)
+    assert json.loads((tmp_path / "key.json").read_text())["references"] == ["Price"]
+
+
+def test_fragment_cache__inexact_values_not_stored(tmp_path):
+    cache = FragmentCache(tmp_path)
+
+    cache.set("lazy", {"operation": {"description": gettext_lazy("Price")}})
+    cache.set("tuple", {"operation": {"enum": (1, 2)}})
+
+    assert cache.get("lazy") is None
+    assert cache.get("tuple") is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,57 @@
+import gzip
+import json
+import zlib
+from io import StringIO
+
+import yaml
+from django.core.management import call_command
+
+
+def test_generate_openapi_schema(tmp_path):
+    output = tmp_path / "schema.yaml"
+    stdout = StringIO()
+
+    call_command("generate_openapi_schema", url_name="openapi-schema", output=str(output), compress=True, stdout=stdout)
+
+    content = output.read_bytes()
+    schema = yaml.safe_load(content)
+    assert schema["info"]["title"] == "Your Project"
+    assert "/api/example/" in schema["paths"]
+    assert gzip.decompress((tmp_path / "schema.yaml.gz").read_bytes()) == content
+    assert zlib.decompress((tmp_path / "schema.yaml.zz").read_bytes()) == content
+    assert "Generated 13 operations and 9 components" in stdout.getvalue()
+
+
+def test_generate_openapi_schema__stdout():
+    stdout = StringIO()
+    stderr = StringIO()
+
+    call_command(
+        "generate_openapi_schema",
+        title="From Options",
+        root_url="api",
+        urlconf="tests.project.urls",
+        private=True,
+        format="json",
+        stdout=stdout,
+        stderr=stderr,
+    )
+
+    schema = json.loads(stdout.getvalue())
+    assert schema["info"] == {"title": "From Options", "version": ""}
+    assert "Rendered" in stderr.getvalue()
+
+
+def test_generate_openapi_schema__workers(tmp_path):
+    outputs = [tmp_path / "schema.json", tmp_path / "schema-workers.json"]
+
+    call_command("generate_openapi_schema", url_name="openapi-schema", output=str(outputs[0]), stdout=StringIO())
+    call_command(
+        "generate_openapi_schema",
+        url_name="openapi-schema",
+        output=str(outputs[1]),
+        workers=3,
+        stdout=StringIO(),
+    )
+
+    assert outputs[0].read_bytes() == outputs[1].read_bytes()
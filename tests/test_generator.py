@@ -0,0 +1,349 @@
+import importlib
+import json
+import sys
+import warnings
+from threading import current_thread
+
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import URLResolver, include, path
+from django.urls.resolvers import RoutePattern
+from pipeline_views import BasePipelineView
+from rest_framework import serializers, viewsets
+from rest_framework.request import Request
+from rest_framework.routers import DefaultRouter
+
+from openapi_schema.generator import OpenAPISchemaGenerator
+from openapi_schema.schema import OpenAPISchema
+from openapi_schema.utils import Endpoint, source_fingerprints
+from tests.project.urls import (
+    InputSerializer,
+    OutputSerializer,
+    PlainViewSet,
+    UserSerializer,
+    UserViewSet,
+    router,
+)
+
+
+class OrderSerializer(serializers.Serializer):
+    """Order"""
+
+    customer = InputSerializer()
+    items = OutputSerializer(many=True)
+
+
+class OrderView(BasePipelineView):
+    """Order View"""
+
+    pipelines = {
+        "POST": [
+            OrderSerializer,
+            OutputSerializer,
+        ],
+    }
+
+    schema = OpenAPISchema()
+
+
+def test_generator__nested_components(drf_request):
+    generator = OpenAPISchemaGenerator(patterns=[path("orders/", OrderView.as_view())], nested_components=True)
+
+    schema = generator.get_schema(drf_request, public=False)
+
+    assert schema["components"]["schemas"] == {
+        "Input": {
+            "type": "object",
+            "properties": {"name": {"type": "string"}, "age": {"type": "integer"}},
+            "required": ["name", "age"],
+        },
+        "Order": {
+            "type": "object",
+            "properties": {
+                "customer": {"$ref": "#/components/schemas/Input"},
+                "items": {"type": "array", "items": {"$ref": "#/components/schemas/Output"}},
+            },
+            "required": ["customer", "items"],
+        },
+        "Output": {
+            "type": "object",
+            "properties": {"email": {"type": "string", "format": "email"}, "age": {"type": "integer"}},
+            "required": ["email", "age"],
+        },
+    }
+
+
+def test_generator__nested_components__inlined_by_default(drf_request):
+    generator = OpenAPISchemaGenerator(patterns=[path("orders/", OrderView.as_view())])
+
+    schema = generator.get_schema(drf_request, public=False)
+
+    assert schema["components"]["schemas"]["Order"]["properties"]["customer"]["properties"] == {
+        "name": {"type": "string"},
+        "age": {"type": "integer"},
+    }
+
+
+def test_generator__share_views(drf_request):
+    generator = OpenAPISchemaGenerator(urlconf="tests.project.urls", share_views=True)
+
+    schema = generator.get_schema(drf_request, public=False)
+
+    views = {}
+    for path_, _, view in generator.get_views(drf_request):
+        views.setdefault(path_, set()).add(id(view))
+    assert all(len(ids) == 1 for ids in views.values())
+    assert len(views) < len(generator.endpoints)
+    assert schema == OpenAPISchemaGenerator(urlconf="tests.project.urls").get_schema(drf_request, public=False)
+
+
+def test_generator__endpoints_do_not_keep_views(drf_request):
+    generator = OpenAPISchemaGenerator(urlconf="tests.project.urls")
+    generator.get_schema(drf_request, public=False)
+
+    assert all(isinstance(endpoint, Endpoint) for endpoint in generator.endpoints)
+
+    other_request = Request(RequestFactory().get("/"))
+    other_request.user = AnonymousUser()
+    for _, method, view in generator.get_views(other_request):
+        assert view.request.method == method
+        assert view.request.user is other_request.user
+
+
+filter_patterns = [
+    path("orders/", OrderView.as_view()),
+    path("shop/", include(([path("orders/", OrderView.as_view())], "shop"), namespace="store")),
+    # Fails if inspected.
+    URLResolver(RoutePattern("admin/"), "tests.project.missing_urls", app_name="admin", namespace="admin"),
+]
+
+
+def test_generator__exclude(drf_request):
+    generator = OpenAPISchemaGenerator(patterns=filter_patterns, exclude=["admin", "/shop/"])
+
+    schema = generator.get_schema(drf_request, public=False)
+
+    assert list(schema["paths"]) == ["/orders/"]
+
+
+def test_generator__include(drf_request):
+    for include_ in (["shop"], ["store"], ["/shop/orders"]):
+        generator = OpenAPISchemaGenerator(patterns=filter_patterns[:2], include=include_)
+        schema = generator.get_schema(drf_request, public=False)
+        assert list(schema["paths"]) == ["/shop/orders/"]
+
+    generator = OpenAPISchemaGenerator(patterns=filter_patterns, include=["/orders/"])
+    schema = generator.get_schema(drf_request, public=False)
+    assert list(schema["paths"]) == ["/orders/"]
+
+
+def test_generator__max_workers(drf_request):
+    with warnings.catch_warnings(record=True) as sequential_warnings:
+        warnings.simplefilter("always")
+        sequential = OpenAPISchemaGenerator(urlconf="tests.project.urls").get_schema(drf_request, public=False)
+
+    for share_views in (False, True):
+        generator = OpenAPISchemaGenerator(urlconf="tests.project.urls", max_workers=4, share_views=share_views)
+        with warnings.catch_warnings(record=True) as parallel_warnings:
+            warnings.simplefilter("always")
+            parallel = generator.get_schema(drf_request, public=False)
+
+        assert json.dumps(parallel) == json.dumps(sequential)
+        assert [str(warning.message) for warning in parallel_warnings] == [
+            str(warning.message) for warning in sequential_warnings
+        ]
+
+
+def test_generator__max_workers__connections(drf_request, monkeypatch):
+    closed = []
+    monkeypatch.setattr(connections, "close_all", lambda: closed.append(current_thread()))
+
+    OpenAPISchemaGenerator(urlconf="tests.project.urls", max_workers=4).get_schema(drf_request, public=False)
+
+    # Connections opened by the worker threads are closed when their tasks are done.
+    assert closed
+    assert current_thread() not in closed
+
+
+def test_generator__max_processes(drf_request, monkeypatch):
+    closed = []
+    monkeypatch.setattr(connections, "close_all", lambda: closed.append(current_thread()))
+    sequential = OpenAPISchemaGenerator(urlconf="tests.project.urls").get_schema(drf_request, public=False)
+
+    generator = OpenAPISchemaGenerator(urlconf="tests.project.urls", max_processes=2)
+    parallel = generator.get_schema(drf_request, public=False)
+
+    assert json.dumps(parallel) == json.dumps(sequential)
+    # Connections are closed before forking, so that the processes do not share them.
+    assert closed == [current_thread()]
+
+
+def test_generator__fragment_cache(drf_request, tmp_path, monkeypatch):
+    schema = OpenAPISchemaGenerator(urlconf="tests.project.urls", fragment_cache_dir=tmp_path).get_schema(
+        drf_request,
+        public=False,
+    )
+
+    def fail(*args, **kwargs):
+        raise AssertionError
+
+    # A restarted process reads the operations from the cache.
+    with monkeypatch.context() as patch:
+        patch.setattr(OpenAPISchemaGenerator, "get_operation", fail)
+        generator = OpenAPISchemaGenerator(urlconf="tests.project.urls", fragment_cache_dir=tmp_path)
+        assert json.dumps(generator.get_schema(drf_request, public=False)) == json.dumps(schema)
+
+
+def test_generator__fragment_key(drf_request, monkeypatch):
+    generator = OpenAPISchemaGenerator(patterns=[path("orders/", OrderView.as_view())])
+
+    def get_key():
+        [(path_, method, view)] = generator.get_views(drf_request)
+        return generator.get_fragment_key(path_, method, view)
+
+    key = get_key()
+    assert get_key() == key
+
+    with monkeypatch.context() as patch:
+        patch.setattr(OrderView.schema, "tags", ["orders"])
+        assert get_key() != key
+
+    # The source of a nested serializer changed.
+    with monkeypatch.context() as patch:
+        patch.setitem(source_fingerprints, sys.modules[InputSerializer.__module__].__file__, "changed")
+        assert get_key() != key
+
+
+def test_generator__component_operations(drf_request):
+    orders = {("/orders/", "POST"), ("/shop/orders/", "POST")}
+
+    for nested_components in (False, True):
+        generator = OpenAPISchemaGenerator(patterns=filter_patterns[:2], nested_components=nested_components)
+        generator.get_schema(drf_request, public=False)
+
+        # Nested serializers are included, whether they are inlined or referenced.
+        assert generator.component_operations == {"Order": orders, "Input": orders, "Output": orders}
+
+
+def test_generator__incremental(monkeypatch):
+    generator = OpenAPISchemaGenerator(patterns=[path("api/", include(router.urls))], incremental=True)
+    schema = generator.get_schema(None, public=True)
+
+    generated = []
+    get_operation = OpenAPISchemaGenerator.get_operation
+
+    def record(self, local_path, method, view):
+        generated.append((local_path, method))
+        return get_operation(self, local_path, method, view)
+
+    monkeypatch.setattr(OpenAPISchemaGenerator, "get_operation", record)
+
+    assert generator.get_schema(None, public=True) == schema
+    assert generated == []
+
+    invalidated = generator.invalidate_serializer(UserSerializer)
+    assert generator.get_schema(None, public=True) == schema
+    assert invalidated == generator.component_operations["User"]
+    assert sorted(generated) == sorted((path_.removeprefix("/"), method) for path_, method in invalidated)
+    assert ("api/plain/viewset/{k}/", "GET") not in generated
+
+
+def test_generator__cache_key__routers():
+    def get_cache_key(*registrations):
+        router = DefaultRouter()
+        for prefix, viewset, basename in registrations:
+            router.register(prefix, viewset, basename=basename)
+        return OpenAPISchemaGenerator(routers={"/api": router}).cache_key
+
+    users = ("users", UserViewSet, "users")
+
+    # Routers of other processes have other addresses, but the same registry.
+    assert get_cache_key(users) == get_cache_key(users)
+    assert get_cache_key(users) != get_cache_key(users, ("plain", PlainViewSet, "plain"))
+
+
+def test_generator__fragment_cache__auto_schema_serializer_changed(drf_request, tmp_path, monkeypatch):
+    # The serializer and the view are in their own modules, like in most projects.
+    modules = tmp_path / "modules"
+    modules.mkdir()
+    serializer_source = (
+        "from rest_framework import serializers\n\n\n"
+        "class ItemSerializer(serializers.Serializer):\n"
+        "    name = serializers.CharField()\n"
+    )
+    (modules / "item_serializers.py").write_text(serializer_source)
+    (modules / "item_views.py").write_text(
+        "from rest_framework import mixins, viewsets\n\n"
+        "from item_serializers import ItemSerializer\n\n\n"
+        "class ItemViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):\n"
+        "    serializer_class = ItemSerializer\n",
+    )
+    monkeypatch.syspath_prepend(str(modules))
+
+    def get_schema():
+        # As if in a new process.
+        for name in ("item_serializers", "item_views"):
+            sys.modules.pop(name, None)
+        source_fingerprints.clear()
+        importlib.invalidate_caches()
+        view = importlib.import_module("item_views").ItemViewSet.as_view({"post": "create"})
+        generator = OpenAPISchemaGenerator(patterns=[path("items/", view)], fragment_cache_dir=tmp_path / "fragments")
+        return generator.get_schema(drf_request, public=False)
+
+    assert list(get_schema()["components"]["schemas"]["Item"]["properties"]) == ["name"]
+
+    (modules / "item_serializers.py").write_text(serializer_source + "    price = serializers.IntegerField()\n")
+
+    assert list(get_schema()["components"]["schemas"]["Item"]["properties"]) == ["name", "price"]
+    for name in ("item_serializers", "item_views"):
+        monkeypatch.delitem(sys.modules, name)
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ["name"]
+
+
+class MemberSerializer(serializers.ModelSerializer):
+    groups = GroupSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = User
+        fields = ["username", "groups"]
+
+
+class MemberViewSet(viewsets.ModelViewSet):
+    queryset = User.objects.all()
+    serializer_class = MemberSerializer
+
+
+def test_generator__incremental__model_viewset(monkeypatch):
+    members = DefaultRouter()
+    members.register("members", MemberViewSet, basename="members")
+    members.register("plain", PlainViewSet, basename="plain")
+    generator = OpenAPISchemaGenerator(patterns=[path("api/", include(members.urls))], incremental=True)
+    schema = generator.get_schema(None, public=True)
+
+    # The nested serializer is inlined, but indexed with the operations using it.
+    member_operations = {
+        (path_, method)
+        for path_, methods in schema["paths"].items()
+        if path_.startswith("/api/members/")
+        for method in (method.upper() for method in methods)
+    }
+    assert generator.component_operations["Group"] == member_operations
+
+    generated = []
+    get_operation = OpenAPISchemaGenerator.get_operation
+
+    def record(self, local_path, method, view):
+        generated.append((f"/{local_path}", method))
+        return get_operation(self, local_path, method, view)
+
+    monkeypatch.setattr(OpenAPISchemaGenerator, "get_operation", record)
+
+    assert generator.invalidate_serializer(GroupSerializer) == member_operations
+    assert generator.get_schema(None, public=True) == schema
+    assert set(generated) == member_operations
@@ -20,6 +20,18 @@ from tests.project.urls import (
 )
 
 
+def test_schema__bound_per_view():
+    first, second = ExampleView(), ExampleView()
+
+    first_schema, second_schema = first.schema, second.schema
+
+    assert first_schema.view is first
+    assert second_schema.view is second
+    assert first.schema is first_schema
+    assert ExampleView.schema is not first_schema
+    assert first_schema.responses is ExampleView.schema.responses
+
+
 def test_schema__get_components(drf_request):
     class CustomView(ExampleView):
         """Custom View"""
@@ -0,0 +1,344 @@
+from django.urls import include, path
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.routers import DefaultRouter, SimpleRouter
+from rest_framework.views import APIView
+
+from openapi_schema.utils import (
+    allowed_methods,
+    cache_serializer_mappings,
+    field_mappers,
+    get_api_endpoints,
+    get_methods,
+    get_serializer_classes,
+    map_field,
+    map_serializer,
+    normalized_paths,
+    persistent_serializer_mappings,
+    reference_nested_serializers,
+    register_field_mapper,
+    resolved_field_mappers,
+)
+from tests.project.urls import (
+    ExamplePathView,
+    InputSerializer,
+    OutputSerializer,
+    UserSerializer,
+    UserViewSet,
+    router,
+)
+
+
+class NestedSerializer(serializers.Serializer):
+    """Nested"""
+
+    input = InputSerializer(required=False)
+    output = OutputSerializer(many=True, read_only=True)
+
+
+def test_map_serializer__cached():
+    with cache_serializer_mappings() as mappings:
+        first = map_serializer(NestedSerializer)
+        first["properties"]["input"]["properties"].clear()
+        second = map_serializer(NestedSerializer)
+
+    assert first is not second
+    assert second == {
+        "type": "object",
+        "properties": {
+            "input": {
+                "type": "object",
+                "properties": {"name": {"type": "string"}, "age": {"type": "integer"}},
+                "required": ["name", "age"],
+            },
+            "output": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"email": {"type": "string", "format": "email"}, "age": {"type": "integer"}},
+                    "required": ["email", "age"],
+                },
+                "readOnly": True,
+            },
+        },
+    }
+    assert set(mappings) == {NestedSerializer, InputSerializer, OutputSerializer}
+    assert NestedSerializer not in persistent_serializer_mappings
+
+
+def test_map_serializer__cached__persistent():
+    with cache_serializer_mappings(persistent=True):
+        map_serializer(NestedSerializer)
+
+    assert NestedSerializer in persistent_serializer_mappings
+    persistent_serializer_mappings.clear()
+
+
+def test_map_serializer__cached__unknown_arguments():
+    class DynamicSerializer(serializers.Serializer):
+        name = serializers.CharField()
+
+        def __init__(self, *args, exclude=(), **kwargs):
+            super().__init__(*args, **kwargs)
+            for name in exclude:
+                self.fields.pop(name)
+
+    with cache_serializer_mappings() as mappings:
+        schema = map_serializer(DynamicSerializer())
+        excluded = map_serializer(DynamicSerializer(exclude=["name"]))
+        not_cached = map_serializer(DynamicSerializer(exclude=iter(["name"])))
+
+    assert schema["properties"] == {"name": {"type": "string"}}
+    assert excluded["properties"] == {}
+    assert not_cached["properties"] == {}
+    assert mappings[DynamicSerializer] == {"": (schema, ()), "exclude=['name']": (excluded, ())}
+
+
+def test_map_serializer__cached__context():
+    class ContextSerializer(serializers.Serializer):
+        name = serializers.CharField()
+
+        def get_fields(self):
+            fields = super().get_fields()
+            if self.context.get("admin"):
+                fields["secret"] = serializers.CharField()
+            return fields
+
+    with cache_serializer_mappings() as mappings:
+        admin = map_serializer(ContextSerializer(context={"admin": True}))
+        user = map_serializer(ContextSerializer(context={"admin": False}))
+
+    # Serializers created with a context are not memoized, since their fields may depend on it.
+    assert list(admin["properties"]) == ["name", "secret"]
+    assert list(user["properties"]) == ["name"]
+    assert ContextSerializer not in mappings
+
+
+def test_map_serializer__reference_nested_serializers():
+    with cache_serializer_mappings(), reference_nested_serializers() as components:
+        schema = map_serializer(NestedSerializer)
+
+    assert schema == {
+        "type": "object",
+        "properties": {
+            "input": {"$ref": "#/components/schemas/Input"},
+            "output": {"type": "array", "items": {"$ref": "#/components/schemas/Output"}, "readOnly": True},
+        },
+    }
+    assert components == {"Input": map_serializer(InputSerializer), "Output": map_serializer(OutputSerializer)}
+
+
+def test_map_serializer__reference_nested_serializers__cached():
+    with cache_serializer_mappings(persistent=True), reference_nested_serializers():
+        map_serializer(NestedSerializer)
+
+    # Memoized schemas add the components they reference to the new context.
+    with cache_serializer_mappings(persistent=True), reference_nested_serializers() as components:
+        map_serializer(NestedSerializer)
+
+    assert set(components) == {"Input", "Output"}
+    persistent_serializer_mappings.clear()
+
+
+class LeafSerializer(serializers.Serializer):
+    name = serializers.CharField()
+
+
+class BranchSerializer(serializers.Serializer):
+    leaf = LeafSerializer(read_only=True, allow_null=True, help_text="the leaf")
+
+
+def test_map_serializer__reference_nested_serializers__field_attributes():
+    with reference_nested_serializers() as components:
+        schema = map_serializer(BranchSerializer)
+
+    # Siblings of '$ref' would be ignored.
+    assert schema["properties"]["leaf"] == {
+        "allOf": [{"$ref": "#/components/schemas/Leaf"}],
+        "readOnly": True,
+        "nullable": True,
+        "description": "the leaf",
+    }
+    assert set(components) == {"Leaf"}
+
+
+class NodeSerializer(serializers.Serializer):
+    name = serializers.CharField()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["parent"] = NodeSerializer(read_only=True, allow_null=True)
+        return fields
+
+
+def test_map_serializer__recursive__field_attributes():
+    with reference_nested_serializers(inline=True):
+        schema = map_serializer(NodeSerializer)
+
+    assert schema["properties"]["parent"] == {
+        "allOf": [{"$ref": "#/components/schemas/Node"}],
+        "readOnly": True,
+        "nullable": True,
+    }
+
+
+class CategorySerializer(serializers.Serializer):
+    name = serializers.CharField()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["children"] = CategorySerializer(many=True, read_only=True)
+        return fields
+
+
+def test_map_serializer__recursive():
+    with reference_nested_serializers(inline=True) as components:
+        schema = map_serializer(CategorySerializer)
+
+    category = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "children": {
+                "type": "array",
+                "items": {"$ref": "#/components/schemas/Category"},
+                "readOnly": True,
+            },
+        },
+        "required": ["name"],
+    }
+    assert schema == category
+    assert components == {"Category": category}
+
+
+def test_map_serializer__recursive__without_components():
+    schema = map_serializer(CategorySerializer)
+
+    assert schema["properties"]["children"]["items"] == {"$ref": "#/components/schemas/Category"}
+
+
+def test_map_serializer__deeply_nested():
+    depth = 2000
+    serializer_class = type("Level0Serializer", (serializers.Serializer,), {"name": serializers.CharField()})
+    for level in range(1, depth):
+        serializer_class = type(f"Level{level}Serializer", (serializers.Serializer,), {"child": serializer_class()})
+
+    schema = map_serializer(serializer_class)
+
+    for _ in range(1, depth):
+        schema = schema["properties"]["child"]
+    assert schema == {"type": "object", "properties": {"name": {"type": "string"}}, "required": ["name"]}
+
+
+def test_map_field():
+    assert map_field(serializers.CharField()) == {"type": "string"}
+    assert map_field(serializers.EmailField()) == {"type": "string", "format": "email"}
+    assert map_field(serializers.MultipleChoiceField(choices=[1, 2])) == {
+        "type": "array",
+        "items": {"type": "integer", "enum": [1, 2]},
+    }
+    assert map_field(serializers.ListField(child=serializers.UUIDField())) == {
+        "type": "array",
+        "items": {"type": "string", "format": "uuid"},
+    }
+    assert map_field(OutputSerializer(many=True)) == {"type": "array", "items": map_serializer(OutputSerializer)}
+    assert resolved_field_mappers[serializers.EmailField] is field_mappers[serializers.EmailField]
+    assert resolved_field_mappers[serializers.CharField] is field_mappers[serializers.Field]
+
+
+def test_map_field__register_field_mapper():
+    class ColorField(serializers.CharField):
+        pass
+
+    class RGBField(ColorField):
+        pass
+
+    assert map_field(RGBField()) == {"type": "string"}
+
+    @register_field_mapper(ColorField)
+    def map_color_field(field):
+        return {"type": "string", "format": "color"}
+
+    try:
+        assert map_field(RGBField()) == {"type": "string", "format": "color"}
+        assert map_field(serializers.CharField()) == {"type": "string"}
+    finally:
+        del field_mappers[ColorField]
+        resolved_field_mappers.clear()
+
+
+def test_get_methods__without_instantiating_view():
+    class ExampleView(APIView):
+        def __init__(self, **kwargs):
+            raise AssertionError
+
+        def get(self, request):
+            pass
+
+        def post(self, request):
+            pass
+
+    assert get_methods(ExampleView.as_view()) == ["GET", "POST"]
+    assert get_methods(ExampleView.as_view(http_method_names=["get"])) == ["GET"]
+    assert allowed_methods[ExampleView, ("get",)] == ("GET",)
+
+
+def test_get_api_endpoints__normalized_paths():
+    pattern = path("users/<int:pk>/", ExamplePathView.as_view())
+    patterns = [path("v1/", include([pattern])), path("v2/", include([pattern]))]
+
+    endpoints = get_api_endpoints(patterns, root="/")
+
+    assert [endpoint.path for endpoint in endpoints] == ["/v1/users/{pk}/", "/v2/users/{pk}/"]
+    assert normalized_paths[pattern] == {"/v1": "/v1/users/{pk}/", "/v2": "/v2/users/{pk}/"}
+
+
+class ActionViewSet(UserViewSet):
+    lookup_url_kwarg = "user_id"
+
+    @action(detail=True, methods=["post"], url_path=r"groups/(?P<group>\d+)")
+    def join(self, request, *args, **kwargs):
+        return Response()
+
+    @action(detail=False)
+    def recent(self, request, *args, **kwargs):
+        return Response()
+
+
+def describe_endpoints(endpoints):
+    return [
+        (endpoint.path, endpoint.method, endpoint.callback.cls, getattr(endpoint.callback, "actions", None))
+        for endpoint in endpoints
+    ]
+
+
+def test_get_api_endpoints__routers():
+    action_router = SimpleRouter(trailing_slash=False)
+    action_router.register(r"orgs/(?P<org>\d+)/users", ActionViewSet, basename="org-users")
+    action_router.register(r"", ActionViewSet, basename="users")
+    path_router = DefaultRouter(use_regex_path=False)
+    path_router.register(r"users", ActionViewSet, basename="users")
+    for routers in ({"/api": router}, {"/": router}, {"v2": action_router}, {"/v3/": path_router}):
+        prefix, router_ = next(iter(routers.items()))
+        patterns = [
+            path("other/<int:age>", ExamplePathView.as_view()),
+            path(prefix.strip("/") + "/" if prefix.strip("/") else "", include(router_.urls)),
+        ]
+
+        endpoints = get_api_endpoints(patterns, root="/", routers=routers)
+
+        assert describe_endpoints(endpoints) == describe_endpoints(get_api_endpoints(patterns, root="/"))
+        assert "/other/{age}/" in {endpoint.path for endpoint in endpoints}
+
+
+def test_get_serializer_classes():
+    options = {"responses": {"GET": {200: [NestedSerializer, "description"], 201: UserSerializer(many=True)}}}
+
+    assert get_serializer_classes(options) == {
+        NestedSerializer,
+        InputSerializer,
+        OutputSerializer,
+        UserSerializer,
+        UserSerializer.Meta.model,
+    }
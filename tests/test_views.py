@@ -0,0 +1,289 @@
+import gzip
+import json
+import os
+import zlib
+from threading import current_thread
+from types import ModuleType
+
+from django.apps import apps
+from django.db import connections
+from django.http import FileResponse
+from django.urls import include, path, resolve
+from rest_framework.response import Response
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APIRequestFactory
+
+from openapi_schema.cache import schema_cache
+from openapi_schema.views import get_schema_view, warm, warm_in_background
+from tests.project.urls import PlainViewSet, UserSerializer, UserViewSet, router
+
+patterns = [path("api/", include(router.urls))]
+
+
+def test_schema_view__cache():
+    schema_cache.clear()
+    schema_cache.reset_stats()
+    view = get_schema_view(title="Cached", root_url="api", patterns=patterns, public=True, cache=True)
+    factory = APIRequestFactory()
+
+    first = view(factory.get("/openapi/"))
+    first.render()
+    second = view(factory.get("/openapi/"))
+    second.render()
+
+    assert first.content == second.content
+    assert second["Content-Type"] == "application/vnd.oai.openapi"
+    assert schema_cache.stats == {"hits": 1, "misses": 1, "size": 1}
+
+    json_response = view(factory.get("/openapi/", HTTP_ACCEPT="application/vnd.oai.openapi+json"))
+    json_response.render()
+    assert json_response["Content-Type"] == "application/vnd.oai.openapi+json"
+    assert json_response.content != first.content
+
+    schema_cache.invalidate(view.view_initkwargs["schema_generator"])
+    assert schema_cache.stats["size"] == 0
+
+
+def test_schema_view__cache__patterns():
+    schema_cache.clear()
+    router_a, router_b = DefaultRouter(), DefaultRouter()
+    router_a.register(r"plain/viewset", PlainViewSet, basename="test_plain_viewset")
+    router_b.register(r"users", UserViewSet, basename="test_users")
+    factory = APIRequestFactory()
+
+    schemas = []
+    for router_ in (router_a, router_b):
+        view = get_schema_view(
+            title="Same",
+            root_url="api",
+            patterns=[path("api/", include(router_.urls))],
+            public=True,
+            cache=True,
+        )
+        response = view(factory.get("/openapi/", HTTP_ACCEPT="application/vnd.oai.openapi+json"))
+        response.render()
+        schemas.append(json.loads(response.content))
+
+    # Views differing only in their URL patterns do not share a cached schema.
+    assert all(path_.startswith("/api/plain/viewset/") for path_ in schemas[0]["paths"])
+    assert "/api/users/" in schemas[1]["paths"]
+    assert schema_cache.stats["size"] == 2
+
+
+def test_schema_view__cache__not_used_for_private_schema():
+    schema_cache.clear()
+    schema_cache.reset_stats()
+    view = get_schema_view(title="Private", root_url="api", patterns=patterns, public=False, cache=True)
+
+    response = view(APIRequestFactory().get("/openapi/"))
+    response.render()
+
+    assert response.status_code == 200
+    assert schema_cache.stats == {"hits": 0, "misses": 0, "size": 0}
+
+
+def test_schema_view__conditional():
+    schema_cache.clear()
+    view = get_schema_view(
+        title="Conditional",
+        root_url="api",
+        patterns=patterns,
+        public=True,
+        cache=True,
+        conditional=True,
+        cache_control="max-age=60",
+    )
+    factory = APIRequestFactory()
+
+    response = view(factory.get("/openapi/"))
+    response.render()
+    etag = response["ETag"]
+
+    assert response.status_code == 200
+    assert response["Cache-Control"] == "max-age=60"
+    assert response["Vary"] == "Accept"
+    assert "Last-Modified" in response
+
+    not_modified = view(factory.get("/openapi/", HTTP_IF_NONE_MATCH=etag))
+    assert not_modified.status_code == 304
+    assert not_modified["ETag"] == etag
+    assert not_modified["Cache-Control"] == "max-age=60"
+    assert not_modified.content == b""
+
+    json_response = view(
+        factory.get("/openapi/", HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT="application/vnd.oai.openapi+json"),
+    )
+    assert json_response.status_code == 200
+    assert json_response["ETag"] != etag
+
+
+def test_schema_view__prerendered():
+    schema_cache.clear()
+    view = get_schema_view(title="Prerendered", root_url="api", patterns=patterns, public=True, cache=True)
+    prerendered_view = get_schema_view(
+        title="Prerendered",
+        root_url="api",
+        patterns=patterns,
+        public=True,
+        cache=True,
+        prerendered=True,
+    )
+    factory = APIRequestFactory()
+
+    response = view(factory.get("/openapi/"))
+    response.render()
+    prerendered = prerendered_view(factory.get("/openapi/"))
+
+    assert not isinstance(prerendered, Response)
+    assert prerendered.content == response.content
+    assert prerendered["Content-Type"] == "application/vnd.oai.openapi"
+
+    json_response = prerendered_view(factory.get("/openapi/", HTTP_ACCEPT="application/vnd.oai.openapi+json"))
+    assert json.loads(json_response.content)["info"]["title"] == "Prerendered"
+    assert json_response["Content-Type"] == "application/vnd.oai.openapi+json"
+
+
+def test_schema_view__compress():
+    schema_cache.clear()
+    view = get_schema_view(
+        title="Compressed",
+        root_url="api",
+        patterns=patterns,
+        public=True,
+        cache=True,
+        prerendered=True,
+        compress=True,
+    )
+    factory = APIRequestFactory()
+
+    plain = view(factory.get("/openapi/", HTTP_ACCEPT_ENCODING="identity"))
+    gzipped = view(factory.get("/openapi/", HTTP_ACCEPT_ENCODING="gzip, deflate"))
+    deflated = view(factory.get("/openapi/", HTTP_ACCEPT_ENCODING="gzip;q=0.5, deflate"))
+
+    assert "Content-Encoding" not in plain
+    assert gzipped["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gzipped.content) == plain.content
+    assert deflated["Content-Encoding"] == "deflate"
+    assert zlib.decompress(deflated.content) == plain.content
+    assert gzipped["Vary"] == "Accept, Accept-Encoding"
+
+
+def test_schema_view__schema_file(tmp_path):
+    schema_file = tmp_path / "schema.yaml"
+    view = get_schema_view(
+        title="File",
+        root_url="api",
+        patterns=patterns,
+        public=True,
+        compress=True,
+        conditional=True,
+        schema_file=schema_file,
+    )
+    factory = APIRequestFactory()
+
+    # Generated on the fly when the file is missing
+    response = view(factory.get("/openapi/"))
+    response.render()
+    assert isinstance(response, Response)
+    assert b"title: File" in response.content
+
+    schema_file.write_bytes(b"openapi: 3.0.2\n")
+    (tmp_path / "schema.yaml.gz").write_bytes(gzip.compress(b"openapi: 3.0.2\n"))
+
+    file_response = view(factory.get("/openapi/"))
+    assert isinstance(file_response, FileResponse)
+    assert b"".join(file_response.streaming_content) == b"openapi: 3.0.2\n"
+    assert file_response["Content-Type"] == "application/vnd.oai.openapi"
+
+    gzipped = view(factory.get("/openapi/", HTTP_ACCEPT_ENCODING="gzip"))
+    assert gzipped["Content-Encoding"] == "gzip"
+    assert gzip.decompress(b"".join(gzipped.streaming_content)) == b"openapi: 3.0.2\n"
+
+    not_modified = view(factory.get("/openapi/", HTTP_IF_MODIFIED_SINCE=file_response["Last-Modified"]))
+    assert not_modified.status_code == 304
+
+    # The file is only used for requests accepting its format
+    json_response = view(factory.get("/openapi/", HTTP_ACCEPT="application/vnd.oai.openapi+json"))
+    json_response.render()
+    assert json.loads(json_response.content)["info"]["title"] == "File"
+
+
+def test_schema_view__schema_file__stale_compressed(tmp_path):
+    schema_file = tmp_path / "schema.yaml"
+    view = get_schema_view(title="File", root_url="api", patterns=patterns, compress=True, schema_file=schema_file)
+    compressed = tmp_path / "schema.yaml.gz"
+    compressed.write_bytes(gzip.compress(b"openapi: 3.0.1\n"))
+    schema_file.write_bytes(b"openapi: 3.0.2\n")
+    modified = schema_file.stat().st_mtime
+    os.utime(compressed, (modified - 60, modified - 60))
+
+    response = view(APIRequestFactory().get("/openapi/", HTTP_ACCEPT_ENCODING="gzip"))
+
+    assert isinstance(response, FileResponse)
+    assert not response.has_header("Content-Encoding")
+    assert b"".join(response.streaming_content) == b"openapi: 3.0.2\n"
+
+
+def test_warm():
+    schema_cache.clear()
+    schema_cache.reset_stats()
+    view = get_schema_view(
+        title="Warm",
+        root_url="api",
+        patterns=patterns,
+        public=True,
+        cache=True,
+        prerendered=True,
+        compress=True,
+    )
+    urlconf = ModuleType("tests.warm_urls")
+    urlconf.urlpatterns = [path("openapi/", view), path("v1/", include([path("openapi/", view)]))]
+
+    assert warm(urlconf) == 1
+    cached = schema_cache.entries[next(iter(schema_cache.entries))]
+    assert set(cached.rendered) == {"application/vnd.oai.openapi", "application/vnd.oai.openapi+json"}
+    assert len(cached.compressed) == 4
+
+    request = APIRequestFactory().get("/openapi/", HTTP_ACCEPT_ENCODING="gzip")
+    request.urlconf = urlconf.__name__
+    response = view(request)
+
+    assert response.content == cached.compressed["application/vnd.oai.openapi", "gzip"]
+    assert schema_cache.stats == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_warm_in_background(monkeypatch):
+    closed = []
+    monkeypatch.setattr(connections, "close_all", lambda: closed.append(current_thread()))
+    schema_cache.clear()
+    view = get_schema_view(title="Warm", root_url="api", patterns=patterns, public=True, cache=True)
+    urlconf = ModuleType("tests.warm_urls")
+    urlconf.urlpatterns = [path("openapi/", view)]
+
+    thread = warm_in_background(urlconf)
+    thread.join(5)
+
+    assert schema_cache.stats["size"] == 1
+    assert closed == [thread]
+
+
+def test_warm__app_ready(settings):
+    generator = resolve("/openapi/").func.view_initkwargs["schema_generator"]
+    generator.endpoints = None
+
+    settings.OPENAPI_SCHEMA_WARM_UP = True
+    apps.get_app_config("openapi_schema").ready()
+
+    assert generator.endpoints is not None
+
+
+def test_schema_view__cache__invalidate_serializer():
+    schema_cache.clear()
+    view = get_schema_view(title="Incremental", root_url="api", patterns=patterns, public=True, cache=True, incremental=True)
+    generator = view.view_initkwargs["schema_generator"]
+    view(APIRequestFactory().get("/openapi/")).render()
+
+    schema_cache.invalidate(generator, serializer_class=UserSerializer)
+
+    assert schema_cache.stats["size"] == 0
+    assert list(generator.fragments) == [("/api/plain/viewset/{k}/", "GET")]